@@ -19,9 +19,15 @@ OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 """
 
 # IMPORTS
+import hashlib
 import os
+import struct
+import time
 import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
+import ujson
 from git import Repo
 
 # CONSTANTS
@@ -38,6 +44,12 @@ EXCLUDED_FILES_AND_FOLDERS = {
     ".DS_Store"
 }
 
+MANIFEST_FILE = "dist/.build-manifest.json"
+COMPRESSION_LEVEL = 9
+FILE_ATTRIBUTES = 0o100644 << 16  # Regular file with `rw-r--r--` permissions
+DIRECTORY_ATTRIBUTES = (0o40755 << 16) | 0x10  # Directory with `rwxr-xr-x` permissions, plus the MS-DOS directory flag
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")  # Local file header, up to (but excluding) the file name
+
 
 # HELPER FUNCTIONS
 def get_latest_commit_timestamp():
@@ -54,36 +66,184 @@ def get_latest_commit_timestamp():
     return latest_timestamp
 
 
-# MAIN CODE
-if __name__ == "__main__":
-    # Get latest commit timestamp
-    latestTimestamp = get_latest_commit_timestamp()
-
-    # Get all non-excluded files
-    toInclude = []
+def get_files_to_include():
+    # Get all non-excluded files, in a deterministic order
+    to_include = []
 
-    for dirName, dirs, files in os.walk("."):
-        if dirName not in EXCLUDED_FILES_AND_FOLDERS:
+    for dir_name, dirs, files in os.walk("."):
+        if dir_name not in EXCLUDED_FILES_AND_FOLDERS:
             # Exclude files and folders
-            dirs[:] = [d for d in dirs if d not in EXCLUDED_FILES_AND_FOLDERS]
-            files[:] = [f for f in files if f not in EXCLUDED_FILES_AND_FOLDERS]
+            dirs[:] = sorted(d for d in dirs if d not in EXCLUDED_FILES_AND_FOLDERS)
+            files[:] = sorted(f for f in files if f not in EXCLUDED_FILES_AND_FOLDERS)
 
             # Add the specific directory if it is not the root directory
-            if dirName != ".":
+            if dir_name != ".":
                 # Skip the first two characters because it is always "./"
-                toInclude.append(dirName[2:])
+                to_include.append(dir_name[2:])
 
             # Add the rest to the master list
             for file in files:
                 # Skip the first two characters because it is always "./"
-                toInclude.append((dirName + "/" + file)[2:])
+                to_include.append((dir_name + "/" + file)[2:])
+
+    return sorted(to_include)
+
+
+def make_zip_info(name, date_time, is_dir):
+    # Make the ZIP entry with fixed metadata, so that rebuilds are byte-identical
+    zip_info = zipfile.ZipInfo(name + "/" if is_dir else name, date_time=date_time)
+    zip_info.create_system = 3  # Unix
+    zip_info.external_attr = DIRECTORY_ATTRIBUTES if is_dir else FILE_ATTRIBUTES
+    return zip_info
+
+
+def compress_member(path):
+    # Read and hash the file
+    with open(path, "rb") as p:  # `p` for file pointer
+        data = p.read()
+    digest = hashlib.sha256(data).hexdigest()
+
+    # Compress the file using raw deflate, storing it as-is if compression does not help
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+    compressed = compressor.compress(data) + compressor.flush()
+
+    if len(compressed) < len(data):
+        return digest, zipfile.ZIP_DEFLATED, zlib.crc32(data), len(data), compressed
+    return digest, zipfile.ZIP_STORED, zlib.crc32(data), len(data), data
+
+
+def hash_member(path):
+    # Hash the file without compressing it
+    with open(path, "rb") as p:
+        return hashlib.sha256(p.read()).hexdigest()
+
+
+def read_raw_member(archive, entry):
+    # Read the compressed bytes of a member straight out of an existing archive
+    archive.seek(entry["header_offset"])
+    header = LOCAL_HEADER.unpack(archive.read(LOCAL_HEADER.size))
+    name_length, extra_length = header[-2], header[-1]
+
+    archive.seek(name_length + extra_length, os.SEEK_CUR)
+    return archive.read(entry["compress_size"])
+
+
+def write_raw_member(zip_file, zip_info, raw_data):
+    # Write an already compressed member. `ZipFile` has no public API for this, so this does the same bookkeeping as
+    # `ZipFile.writestr()` does (checked against CPython 3.8 to 3.12; `tests/test_package_zip.py` checks the output):
+    # - `fp` is positioned at the end of the last member while the archive is open for writing;
+    # - `FileHeader()` builds the local file header from the compression type, CRC and sizes, adding the ZIP64 extra
+    #   field when asked to;
+    # - `close()` writes the central directory at `start_dir` from `filelist`, but only if `_didModify` is set.
+    zip_info.compress_size = len(raw_data)
+    zip_info.header_offset = zip_file.fp.tell()
+    zip64 = max(zip_info.file_size, zip_info.compress_size) > zipfile.ZIP64_LIMIT
+
+    zip_file.fp.write(zip_info.FileHeader(zip64=zip64))
+    zip_file.fp.write(raw_data)
+
+    zip_file.filelist.append(zip_info)
+    zip_file.NameToInfo[zip_info.filename] = zip_info
+    zip_file.start_dir = zip_file.fp.tell()
+    zip_file._didModify = True
+
+
+def load_manifest():
+    # Load the manifest of the previous build, if it still exists
+    try:
+        with open(MANIFEST_FILE, "r") as p:
+            manifest = ujson.load(p)
+    except (OSError, ValueError):
+        return None
+
+    if not os.path.isfile(manifest.get("archive", "")):
+        return None
+    return manifest
+
+
+def build_zip(name, to_include, date_time, previous_manifest):
+    # Work out which members can be reused from the previous archive
+    files_to_include = [path for path in to_include if os.path.isfile(path)]
+    previous_members = previous_manifest["members"] if previous_manifest else {}
+
+    with ThreadPoolExecutor() as executor:
+        digests = dict(zip(files_to_include, executor.map(hash_member, files_to_include)))
+        to_compress = [
+            path for path in files_to_include
+            if previous_members.get(path, {}).get("sha256") != digests[path]
+        ]
+
+        # Compress the changed members in parallel
+        compressed = dict(zip(to_compress, executor.map(compress_member, to_compress)))
 
     # Create the ZIP file
+    temp_name = name + ".tmp"
+    members = {}
+    num_reused = 0
+
+    previous_archive = open(previous_manifest["archive"], "rb") if previous_manifest else None
+    try:
+        with zipfile.ZipFile(temp_name, "w") as f:
+            # Add required files
+            for file in to_include:
+                if not os.path.isfile(file):
+                    f.writestr(make_zip_info(file, date_time, is_dir=True), b"")
+                    continue
+
+                zip_info = make_zip_info(file, date_time, is_dir=False)
+
+                if file in compressed:
+                    digest, zip_info.compress_type, zip_info.CRC, zip_info.file_size, raw_data = compressed[file]
+                else:
+                    entry = previous_members[file]
+                    digest = entry["sha256"]
+                    zip_info.compress_type, zip_info.CRC, zip_info.file_size = \
+                        entry["compress_type"], entry["crc"], entry["file_size"]
+                    raw_data = read_raw_member(previous_archive, entry)
+                    num_reused += 1
+
+                write_raw_member(f, zip_info, raw_data)
+                members[file] = {
+                    "sha256": digest,
+                    "compress_type": zip_info.compress_type,
+                    "crc": zip_info.CRC,
+                    "file_size": zip_info.file_size,
+                    "compress_size": zip_info.compress_size,
+                    "header_offset": zip_info.header_offset
+                }
+    finally:
+        if previous_archive is not None:
+            previous_archive.close()
+
+    os.replace(temp_name, name)
+
+    # Save the manifest for the next build
+    with open(MANIFEST_FILE, "w") as p:
+        ujson.dump({"archive": name, "members": members}, p, indent=2)
+
+    return members, num_reused
+
+
+# MAIN CODE
+if __name__ == "__main__":
+    startTime = time.perf_counter()
+
+    # Get latest commit timestamp, which is also used as the timestamp of every member
+    latestTimestamp = get_latest_commit_timestamp()
+    dateTime = max(time.gmtime(latestTimestamp)[:6], (1980, 1, 1, 0, 0, 0))
+
+    # Build the ZIP file out of all non-excluded files, reusing unchanged members of the previous archive
+    os.makedirs("dist", exist_ok=True)
     name = f"dist/API-Server-{latestTimestamp}.zip"
-    with zipfile.ZipFile(name, "w") as f:
-        # Add required files
-        for file in toInclude:
-            f.write(file)
+    members, numReused = build_zip(name, get_files_to_include(), dateTime, load_manifest())
 
     # Report completion
+    totalSize = sum(member["file_size"] for member in members.values())
+    archiveSize = os.path.getsize(name)
+
     print(f"Created '{name}' using commit with timestamp {latestTimestamp}.")
+    print(
+        f"Packed {len(members)} files ({numReused} reused from the previous build) in "
+        f"{time.perf_counter() - startTime:.2f}s; {totalSize} bytes compressed to {archiveSize} bytes "
+        f"({totalSize - archiveSize} bytes saved)."
+    )
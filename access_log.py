@@ -0,0 +1,149 @@
+"""
+access_log.py
+Description: Non-blocking structured (JSON lines) access and error logging.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import os
+import queue
+import random
+import threading
+
+import ujson
+
+
+# CLASSES
+class AccessLogger:
+    """
+    Logger that writes records as JSON lines from a background thread.
+
+    Records are put onto a bounded in-memory queue, which a background thread drains in batches. When the queue is
+    full, records are dropped (and counted) rather than blocking the request. The log file is rotated once it exceeds
+    `max_bytes`, keeping `backup_count` old files.
+    """
+
+    def __init__(self, path, max_queue_size=10000, batch_size=100, flush_interval=1.0, max_bytes=10_000_000,
+                 backup_count=5, sample_rates=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.sample_rates = sample_rates or {}  # Maps the route to the fraction of its records that are kept
+
+        self.dropped = 0  # Number of records dropped because the queue was full
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def log(self, record):
+        """
+        Queues a record for writing, without blocking.
+
+        Records of error responses are always kept; other records are sampled based on their route's sample rate.
+        Returns whether the record was queued.
+        """
+
+        sample_rate = self.sample_rates.get(record.get("route"), 1)
+        if record.get("status", 0) < 400 and sample_rate < 1:
+            if random.random() >= sample_rate:
+                return False
+            record["sample_rate"] = sample_rate
+
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def start(self):
+        """
+        Starts the background writer thread.
+        """
+
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(target=self._run, name="access-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """
+        Stops the background writer thread, after it has written all the queued records.
+        """
+
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def flush(self):
+        """
+        Writes all the currently queued records.
+        """
+
+        while True:
+            batch = self._get_batch(block=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            batch = self._get_batch(block=True)
+            if batch:
+                self._write(batch)
+
+        # Write whatever is left before exiting
+        self.flush()
+
+    def _get_batch(self, block):
+        batch = []
+        try:
+            if block:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        return batch
+
+    def _write(self, batch):
+        try:
+            with open(self.path, "a") as p:  # `p` for file pointer
+                p.write("".join(ujson.dumps(record) + "\n" for record in batch))
+                size = p.tell()
+
+            if size >= self.max_bytes:
+                self._rotate()
+        except OSError:
+            # Logging must never take the server down; the records are simply lost
+            self.dropped += len(batch)
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
@@ -19,23 +19,70 @@ OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 """
 
 # IMPORTS
+import atexit
 import datetime
+import multiprocessing
+import os
 import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import semver
 import ujson
-from flask import Flask, make_response, request, send_from_directory
+from flask import Flask, g, has_request_context, make_response, redirect, request, send_from_directory
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from requests import get
 from werkzeug.exceptions import HTTPException
 
+import access_log
+import compression
+import ffmpeg_delta
+import github_client
+import mirrors
+import refresh_scheduler
+import static_manifest
+import tags
+import telemetry
+
 # CONSTANTS
 AUDITRANSCRIBE_REPO = "AudiTranscribe/AudiTranscribe"
+DEFAULT_REPOSITORY_KEY = "auditranscribe"
+FFMPEG_VERSION = "5.1.1"
+FFMPEG_PLATFORMS = ["MACOS", "WINDOWS"]
+FFMPEG_DIR = "data/ffmpeg"
+TELEMETRY_ENDPOINTS = {"check_if_have_new_version", "download_ffmpeg"}  # Endpoints whose hits are counted
+TELEMETRY_OTHER_VERSION = "other"  # Version counted for versions that are not tagged
+TELEMETRY_MAX_HITS = 100  # Largest number of grouped hit counts returned by the telemetry page
 
 # SETUP
 # Set up flask application and limiter
 application = Flask(__name__)
+application.config.update({
+    "STATIC_MANIFEST_DIR": None,  # Directory to write the static update manifest to; `None` disables it
+    "DOWNLOAD_MIRRORS": [],  # Mirrors to redirect downloads to; an empty list serves downloads locally
+    "DOWNLOAD_MIRROR_CHECK_INTERVAL": 30,  # Seconds between mirror health checks
+    "ACCESS_LOG_FILE": None,  # JSON lines file to write the access log to; `None` disables access logging
+    "ACCESS_LOG_QUEUE_SIZE": 10000,  # Maximum number of unwritten records before new records are dropped
+    "ACCESS_LOG_MAX_BYTES": 10_000_000,  # Size at which the access log is rotated
+    "ACCESS_LOG_BACKUP_COUNT": 5,  # Number of rotated access logs to keep
+    "ACCESS_LOG_SAMPLE_RATES": {},  # Maps routes (e.g. "/versions") to the fraction of successful requests logged
+    "COMPRESSION_MIN_SIZE": 1024,  # JSON responses smaller than this many bytes are not compressed
+    "TRACKED_REPOSITORIES": {  # Maps the (case-insensitive) `repo` argument key to the repository and its TTL
+        DEFAULT_REPOSITORY_KEY: {"repo": AUDITRANSCRIBE_REPO, "ttl": 300}
+    },
+    "TAG_REFRESH_SCHEDULER": False,  # Whether to refresh the tags of all tracked repositories in the background
+    "TAG_REFRESH_MAX_WORKERS": 4,  # Maximum number of repositories refreshed at the same time
+    "TAG_REFRESH_JITTER": 0.1,  # Fraction by which refresh intervals are randomly lengthened or shortened
+    "GITHUB_API_URL": "https://api.github.com",
+    "GITHUB_TIMEOUT": 10,  # Seconds to wait for the GitHub API before giving up
+    "GITHUB_FAILURE_THRESHOLD": 3,  # Consecutive failures after which requests to GitHub are stopped
+    "GITHUB_MAX_BACKOFF": 300,  # Longest time (in seconds) that requests to GitHub are stopped for
+    "TELEMETRY_DB": None,  # SQLite database to count version checks and FFmpeg downloads in; `None` disables telemetry
+    "TELEMETRY_FLUSH_INTERVAL": 10,  # Seconds between writes of the counts to the telemetry database
+})
+application.config.from_prefixed_env()  # Allow overriding the configuration using `FLASK_`-prefixed variables
+
 limiter = Limiter(
     application,
     key_func=get_remote_address,
@@ -47,8 +94,28 @@ limiter.enabled = not application.config.get("TESTING")
 with open("API Server Version.txt", "r") as f:
     apiServerVersion = int(f.read())
 
+# Set up GitHub API client
+github = github_client.GitHubClient(
+    api_url=application.config["GITHUB_API_URL"],
+    timeout=application.config["GITHUB_TIMEOUT"],
+    breaker=github_client.CircuitBreaker(
+        failure_threshold=application.config["GITHUB_FAILURE_THRESHOLD"],
+        max_backoff=application.config["GITHUB_MAX_BACKOFF"]
+    )
+)
+
 # GLOBAL VARIABLES
 cache = {}  # First element in tuple is the time of caching, second element is the data itself
+compressed_cache = {}  # Maps `(endpoint, cache key, encoding)` to the cached source data and the compressed body
+manifest_executor = None  # Thread that writes the static manifest in the background
+manifest_write = None  # Future of the queued (or latest) static manifest write
+manifest_lock = threading.Lock()
+mirror_pool = None  # Created when the first download is requested, based on the configured mirrors
+patch_executor = None  # Process pool that builds FFmpeg delta patches in the background
+patch_builds = {}  # Maps the patch path to the future of the build that creates it
+access_logger = None  # Created when the first request is logged, based on the configured access log file
+tag_refresh_scheduler = None  # Created on startup if background tag refreshing is enabled
+telemetry_counters = None  # Created when the first hit is counted, based on the configured telemetry database
 
 
 # HELPER FUNCTIONS
@@ -62,12 +129,26 @@ def get_from_cache(key, cache_duration):
 
     # Check if the cache contains the key and if the cache expired or not
     if key in cache and now <= cache[key][0] + cache_duration:
+        record_cache_event(key, "hit")
         return True, cache[key][1]
 
     # Invalid cache value
+    record_cache_event(key, "miss")
     return False, None
 
 
+def record_cache_event(key, event):
+    """
+    Helper function that records a cache hit or miss for the access log of the current request.
+
+    Only the first lookup of each key is recorded, since later lookups in the same request (e.g. after the entry was
+    refreshed) would hide the miss.
+    """
+
+    if has_request_context():
+        g.setdefault("cache_events", {}).setdefault(key, event)
+
+
 def add_to_cache(key, data):
     """
     Helper function that helps add data to the cache.
@@ -77,70 +158,583 @@ def add_to_cache(key, data):
     cache[key] = (now, data)
 
 
-def make_json(status, status_code, **kwargs):
+def make_json(status, status_code, cache_key=None, source=None, build=None, **kwargs):
     """
     Helper function that forms a JSON response based on the status string, status code, and additional arguments.
+
+    Large responses are compressed using the best encoding that the client accepts. If `cache_key` and `source` are
+    given, the response must be fully determined by the endpoint, that key and `source` (the cached data that the
+    response was built from); its compressed body is then reused for as long as the same source data is passed in.
+    Expensive arguments should then be returned (as a dictionary) by `build`, which is only called if the body is not
+    reused.
     """
 
-    response = make_response(ujson.dumps({
+    # Work out whether the response can be compressed
+    encoding = None
+    if has_request_context():
+        encoding = compression.choose_encoding(request.accept_encodings)
+
+    compressed_key = None
+    if encoding is not None and cache_key is not None and source is not None:
+        compressed_key = (request.endpoint, cache_key, encoding)
+
+    # Reuse the compressed body if it was compressed from the same source data
+    compressed_entry = compressed_cache.get(compressed_key)
+    if compressed_entry is not None and compressed_entry[0] is source:
+        return make_compressed_json(compressed_entry[1], status_code, encoding)
+
+    if build is not None:
+        kwargs.update(build())
+
+    body = ujson.dumps({
         "status": status,
         **kwargs
-    }), status_code)
+    })
+
+    if encoding is not None and len(body) >= application.config["COMPRESSION_MIN_SIZE"]:
+        compressed_body = compression.compress(body.encode("UTF-8"), encoding)
+        if compressed_key is not None:
+            compressed_cache[compressed_key] = (source, compressed_body)
+
+        return make_compressed_json(compressed_body, status_code, encoding)
+
+    response = make_response(body, status_code)
     response.mimetype = "application/json"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def make_compressed_json(compressed_body, status_code, encoding):
+    """
+    Helper function that forms a JSON response out of an already compressed body.
+    """
+
+    response = make_response(compressed_body, status_code)
+    response.mimetype = "application/json"
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def get_tags_cache_key(repo_key):
+    """
+    Helper function that gets the cache key of the version tags of a tracked repository.
+    """
+
+    return f"tags:{repo_key}"
+
+
+def fetch_tags(repo_key=DEFAULT_REPOSITORY_KEY):
+    """
+    Helper function that gets the version tags of a tracked repository, either from the cache or from the GitHub API.
+
+    Returns a tuple. The first element is whether the fetch succeeded. The second element is the tag table if the fetch
+    succeeded, and the error response otherwise.
+    """
+
+    # Try and get from the cache, keeping entries for longer when the GitHub rate limit budget is running low
+    ttl = get_tracked_repositories()[repo_key].get("ttl", 300) * github.budget.get_ttl_multiplier()
+    success, tag_table = get_from_cache(get_tags_cache_key(repo_key), ttl)
+
+    if success:
+        return True, tag_table
+
+    return refresh_tags(repo_key)
+
+
+def refresh_tags(repo_key):
+    """
+    Helper function that fetches the version tags of a tracked repository from the GitHub API, updating the cache.
+
+    If GitHub cannot be reached (or is not being contacted because of earlier failures), the cached tags are used even
+    if they have expired.
+
+    Returns a tuple, like `fetch_tags()`.
+    """
+
+    # Send request to GitHub server for all the version tags, keeping only the fields that we need
+    try:
+        response, pairs = github.get_all(
+            f"repos/{get_tracked_repositories()[repo_key]['repo']}/tags",
+            transform=tags.get_name_sha_pairs
+        )
+    except github_client.UpstreamUnavailableError as e:
+        success, tag_table = get_from_cache(get_tags_cache_key(repo_key), float("inf"))
+        if success:
+            return True, tag_table
+
+        return False, make_exception(code=503, name="Service Unavailable", description=str(e))
+
+    if pairs is None:
+        success, tag_table = get_from_cache(get_tags_cache_key(repo_key), float("inf"))
+        if success and (response.status_code >= 500 or response.status_code in {403, 429}):
+            return True, tag_table
+
+        return False, make_exception(
+            code=response.status_code,
+            name=response.reason,
+            description="Could not fetch tags"
+        )
+
+    tag_table = tags.TagTable.from_pairs(pairs)
+
+    # Update the cache and the static manifest
+    add_to_cache(get_tags_cache_key(repo_key), tag_table)
+    if repo_key == DEFAULT_REPOSITORY_KEY:
+        refresh_static_manifest()
+
+    return True, tag_table
+
+
+def get_tracked_repositories():
+    """
+    Helper function that gets the tracked repositories, with their keys in lowercase.
+    """
+
+    return {key.lower(): repository for key, repository in application.config["TRACKED_REPOSITORIES"].items()}
+
+
+def get_requested_repository():
+    """
+    Helper function that gets the key of the repository requested using the `repo` argument.
+
+    Returns a tuple. The first element is whether the repository is tracked. The second element is the repository key
+    if it is tracked, and the error response otherwise.
+    """
+
+    repo_key = request.args.get("repo", DEFAULT_REPOSITORY_KEY).lower()
+    tracked_repositories = get_tracked_repositories()
+
+    if repo_key not in tracked_repositories:
+        return False, make_exception(
+            code=400,
+            name="Invalid Request",
+            description=f"Unknown repository '{repo_key}'. "
+                        f"Must be one of {', '.join(repr(key) for key in sorted(tracked_repositories))}."
+        )
+
+    return True, repo_key
+
+
+def start_tag_refresh_scheduler():
+    """
+    Helper function that starts refreshing the tags of all tracked repositories in the background.
+    """
+
+    global tag_refresh_scheduler
+
+    def refresh(repo_key):
+        with application.app_context():
+            success, result = refresh_tags(repo_key)
+            if not success:
+                application.logger.warning(f"Could not refresh tags of '{repo_key}': {result.json['description']}")
+
+    tag_refresh_scheduler = refresh_scheduler.RefreshScheduler(
+        refresh,
+        max_workers=application.config["TAG_REFRESH_MAX_WORKERS"],
+        jitter=application.config["TAG_REFRESH_JITTER"],
+        interval_multiplier=github.budget.get_ttl_multiplier
+    )
+    for repo_key, repository in get_tracked_repositories().items():
+        tag_refresh_scheduler.register(repo_key, repository.get("ttl", 300))
+
+    tag_refresh_scheduler.start()
+
+
+def get_ffmpeg_signatures(refresh_manifest=True):
+    """
+    Helper function that gets the FFmpeg signatures for all platforms, either from the cache or from the files.
+
+    If the signatures had to be read from the files, the static manifest is refreshed unless `refresh_manifest` is
+    false (as it is when the manifest is already being refreshed).
+    """
+
+    # Try and read the FFmpeg signatures from cache
+    success, ffmpeg_signatures = get_from_cache("ffmpeg_signatures", 3600)  # 1 day
+    if not success:
+        # Read FFmpeg signatures from files
+        ffmpeg_signatures = {}
+        for platform in FFMPEG_PLATFORMS:
+            with open(f"{FFMPEG_DIR}/ffmpeg-{FFMPEG_VERSION}-{platform}.zip.sha256") as p:  # `p` for file pointer
+                ffmpeg_signatures[platform] = p.read().strip()
+
+        # Cache the signatures and update the static manifest
+        add_to_cache("ffmpeg_signatures", ffmpeg_signatures)
+        if refresh_manifest:
+            refresh_static_manifest()
+
+    return ffmpeg_signatures
+
+
+def get_audio_resource_signature(refresh_manifest=True):
+    """
+    Helper function that gets the audio resource signature, either from the cache or from the file.
+
+    If the signature had to be read from the file, the static manifest is refreshed unless `refresh_manifest` is false.
+    """
+
+    # Try and read the signature from cache
+    success, audio_resource_signature = get_from_cache("audio_resource_signature", 3600)  # 1 day
+    if not success:
+        # Read signature from file
+        with open("data/audio/Breakfast.wav.sha256", "r") as p:
+            audio_resource_signature = p.read().strip()
+
+        # Cache the signature and update the static manifest
+        add_to_cache("audio_resource_signature", audio_resource_signature)
+        if refresh_manifest:
+            refresh_static_manifest()
+
+    return audio_resource_signature
+
+
+def refresh_static_manifest():
+    """
+    Helper function that marks the static update manifest as out of date, if a manifest directory has been configured.
+
+    The manifest is rewritten on a background thread, so that its disk writes stay off the request path. Refreshes
+    requested while a write is still queued are handled by that write. Returns the future of the write (or `None` if
+    the manifest is disabled).
+    """
+
+    global manifest_executor, manifest_write
+
+    if not application.config.get("STATIC_MANIFEST_DIR"):
+        return None
+
+    with manifest_lock:
+        if manifest_write is not None and not manifest_write.running() and not manifest_write.done():
+            return manifest_write  # The queued write will pick up the latest data
+
+        if manifest_executor is None:
+            manifest_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="manifest-writer")
+
+        manifest_write = manifest_executor.submit(write_static_manifest)
+        return manifest_write
+
+
+def write_static_manifest():
+    """
+    Helper function that regenerates the static update manifest.
+
+    The manifest is only written once the tags have been fetched, since a manifest without the version files would be
+    incomplete. Any stale cached data is still used, as it is the most recent data that the API server has.
+    """
+
+    output_dir = application.config.get("STATIC_MANIFEST_DIR")
+    if not output_dir:
+        return
+
+    success, tag_table = get_from_cache(get_tags_cache_key(DEFAULT_REPOSITORY_KEY), float("inf"))
+    if not success:
+        return
+
+    try:
+        static_manifest.write_manifest(
+            output_dir,
+            static_manifest.build_manifest(
+                list(tag_table.names),
+                get_ffmpeg_signatures(refresh_manifest=False),
+                get_audio_resource_signature(refresh_manifest=False)
+            )
+        )
+    except OSError as e:
+        # The API server remains the source of truth, so a failed write only needs to be reported
+        application.logger.warning(f"Could not write static manifest: {e}")
+
+
+def get_mirror_pool():
+    """
+    Helper function that gets the mirror pool, (re)creating it if the configured mirrors have changed.
+    """
+
+    global mirror_pool
+
+    mirrors_config = application.config.get("DOWNLOAD_MIRRORS") or []
+    if mirror_pool is None or mirror_pool.config != mirrors_config:
+        if mirror_pool is not None:
+            mirror_pool.stop()
+
+        mirror_pool = mirrors.MirrorPool.from_config(
+            mirrors_config,
+            check_interval=application.config.get("DOWNLOAD_MIRROR_CHECK_INTERVAL", 30)
+        )
+        mirror_pool.start()
+
+    return mirror_pool
+
+
+def send_data_file(directory, filename):
+    """
+    Helper function that sends a file in the `data` directory.
+
+    If download mirrors are configured, this redirects to a healthy mirror instead. It falls back to sending the file
+    from the API server when no mirror is healthy.
+    """
+
+    url = get_mirror_pool().url_for(f"{directory}/{filename}")
+    if url is not None:
+        return redirect(url, 302)
+
+    return send_from_directory(f"data/{directory}", filename)
+
+
+def get_ffmpeg_bundles():
+    """
+    Helper function that gets the known FFmpeg bundles, mapping `(platform, signature)` to the bundle's version.
+    """
+
+    success, bundles = get_from_cache("ffmpeg_bundles", 3600)  # 1 day
+    if not success:
+        bundles = ffmpeg_delta.find_bundles(FFMPEG_DIR)
+        add_to_cache("ffmpeg_bundles", bundles)
+
+    return bundles
+
+
+def schedule_patch_build(source_version, platform):
+    """
+    Helper function that builds the patch from the given FFmpeg version to the current version in the background.
+    """
+
+    global patch_executor
+
+    source_path = ffmpeg_delta.get_bundle_path(FFMPEG_DIR, source_version, platform)
+    target_path = ffmpeg_delta.get_bundle_path(FFMPEG_DIR, FFMPEG_VERSION, platform)
+    patch_path = ffmpeg_delta.get_patch_path(FFMPEG_DIR, source_version, FFMPEG_VERSION, platform)
+
+    # Only build patches between bundles that we have, and only build each patch once at a time
+    if not (os.path.exists(source_path) and os.path.exists(target_path)):
+        return
+    if patch_path in patch_builds and not patch_builds[patch_path].done():
+        return
+
+    if patch_executor is None:
+        # Spawn (rather than fork) the builder, since forking this multithreaded process could copy held locks
+        patch_executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    def log_failure(future):
+        if future.exception() is not None:
+            application.logger.warning(f"Could not build '{patch_path}': {future.exception()}")
+
+    patch_builds[patch_path] = patch_executor.submit(ffmpeg_delta.build_patch, source_path, target_path, patch_path)
+    patch_builds[patch_path].add_done_callback(log_failure)
+
+
+def send_ffmpeg_patch(platform, current_hash):
+    """
+    Helper function that sends the delta patch from the client's current FFmpeg bundle to the current version.
+
+    Returns `None` if the patch is unavailable or is not smaller than the full bundle, in which case the full bundle
+    should be sent instead. A missing patch is built in the background for subsequent requests.
+    """
+
+    source_version = get_ffmpeg_bundles().get((platform, current_hash))
+    if source_version is None or source_version == FFMPEG_VERSION:
+        return None
+
+    patch_path = ffmpeg_delta.get_patch_path(FFMPEG_DIR, source_version, FFMPEG_VERSION, platform)
+    bundle_path = ffmpeg_delta.get_bundle_path(FFMPEG_DIR, FFMPEG_VERSION, platform)
+
+    try:
+        if os.path.getsize(patch_path) >= os.path.getsize(bundle_path):
+            return None
+    except OSError:
+        schedule_patch_build(source_version, platform)
+        return None
+
+    response = send_from_directory(
+        os.path.dirname(patch_path), os.path.basename(patch_path), mimetype="application/octet-stream"
+    )
+    response.headers["X-Delta-Base"] = current_hash
+    response.headers["X-Target-SHA256"] = get_ffmpeg_signatures()[platform]
+    return response
+
+
+def get_access_logger():
+    """
+    Helper function that gets the access logger, (re)creating it if the configured access log file has changed.
+
+    Returns `None` if access logging is disabled.
+    """
+
+    global access_logger
+
+    path = application.config.get("ACCESS_LOG_FILE")
+    if access_logger is not None and access_logger.path != path:
+        access_logger.stop()
+        access_logger = None
+
+    if access_logger is None and path:
+        access_logger = access_log.AccessLogger(
+            path,
+            max_queue_size=application.config["ACCESS_LOG_QUEUE_SIZE"],
+            max_bytes=application.config["ACCESS_LOG_MAX_BYTES"],
+            backup_count=application.config["ACCESS_LOG_BACKUP_COUNT"],
+            sample_rates=application.config["ACCESS_LOG_SAMPLE_RATES"]
+        )
+        access_logger.start()
+        atexit.register(access_logger.stop)
+
+    return access_logger
+
+
+def get_telemetry_counters():
+    """
+    Helper function that gets the telemetry counters, (re)creating them if the configured database has changed.
+
+    Returns `None` if telemetry is disabled.
+    """
+
+    global telemetry_counters
+
+    path = application.config.get("TELEMETRY_DB")
+    if telemetry_counters is not None and telemetry_counters.path != path:
+        telemetry_counters.stop()
+        telemetry_counters = None
+
+    if telemetry_counters is None and path:
+        telemetry_counters = telemetry.TelemetryCounters(
+            path,
+            flush_interval=application.config["TELEMETRY_FLUSH_INTERVAL"]
+        )
+        telemetry_counters.start()
+        atexit.register(telemetry_counters.stop)
+
+    return telemetry_counters
+
+
+# REQUEST HOOKS
+@application.before_request
+def start_request_timer():
+    g.request_start_time = time.perf_counter()
+
+
+@application.after_request
+def log_request(response):
+    """
+    Records the request in the access log, if access logging is enabled.
+    """
+
+    logger = get_access_logger()
+    if logger is None:
+        return response
+
+    record = {
+        "time": round(time.time(), 3),
+        "method": request.method,
+        "route": request.url_rule.rule if request.url_rule is not None else None,
+        "path": request.path,
+        "status": response.status_code,
+        "latency_ms": round((time.perf_counter() - g.get("request_start_time", time.perf_counter())) * 1000, 3),
+        "bytes": response.content_length,
+        "cache": g.get("cache_events"),
+        "remote_addr": request.remote_addr
+    }
+    if "error" in g:
+        record["error"] = g.error
+
+    logger.log(record)
+    return response
+
+
+@application.after_request
+def count_hit(response):
+    """
+    Counts version checks and FFmpeg downloads, if telemetry is enabled.
+    """
+
+    if request.endpoint not in TELEMETRY_ENDPOINTS:
+        return response
+
+    # Signature requests are not downloads
+    if request.endpoint == "download_ffmpeg" and request.args.get("signature_needed", "").upper() == "TRUE":
+        return response
+
+    counters = get_telemetry_counters()
+    if counters is None:
+        return response
+
+    # Only count known platforms and tagged versions, so that clients cannot create arbitrarily many counters
+    platform = request.args.get("platform", "").upper()
+    version = request.args.get("current-version", "")
+
+    if version != "":
+        cached_tags = cache.get(get_tags_cache_key(request.args.get("repo", DEFAULT_REPOSITORY_KEY).lower()))
+        if cached_tags is None or version not in cached_tags[1].names:
+            version = TELEMETRY_OTHER_VERSION
+
+    counters.record(
+        request.url_rule.rule,
+        platform=platform if platform in FFMPEG_PLATFORMS else "",
+        version=version,
+        status=response.status_code
+    )
     return response
 
 
 # MAIN ROUTES
 @application.route("/get-raw-info")
 def get_raw_info():
-    # Try and get from the cache
-    success, raw_info = get_from_cache("raw_info", 300)
+    """
+    Gets the tag info from the GitHub API.
 
-    if not success:
-        # Form the URL
-        url = f"https://api.github.com/repos/{AUDITRANSCRIBE_REPO}/tags"
+    Optionally accepts `repo`, the key of the tracked repository to get the tags of (defaults to AudiTranscribe), and
+    `fields`, a comma-separated list of the fields to include for each tag. The available fields are "name" and
+    "commit.sha", which are both included by default.
+    """
 
-        # Send request to GitHub server for all the version tags
-        response = get(url)
+    # Get the requested repository
+    success, repo_key = get_requested_repository()
+    if not success:
+        return repo_key  # This is the error response
 
-        if response.status_code == 200:
-            # Save the response
-            raw_info = response.text
+    # Get the fields to include
+    try:
+        fields = tags.parse_fields(request.args.get("fields", "")) or tags.FIELDS
+    except ValueError as e:
+        return make_exception(code=400, name="Invalid Request", description=str(e))
 
-            # Update the cache
-            add_to_cache("raw_info", raw_info)
-        else:
-            return make_exception(
-                code=response.status_code,
-                name=response.reason,
-                description="Could not fetch tags"
-            )
+    success, tag_table = fetch_tags(repo_key)
+    if not success:
+        return tag_table  # This is the error response
 
     # Return as JSON
-    return make_json("OK", 200, raw_info=raw_info)
+    return make_json(
+        "OK",
+        200,
+        cache_key=(get_tags_cache_key(repo_key), fields),
+        source=tag_table,
+        build=lambda: {"raw_info": ujson.dumps(tag_table.project(fields))}
+    )
 
 
 @application.route("/versions")
 def get_versions():
     """
     Get a list of the version tags.
+
+    Optionally accepts `repo`, the key of the tracked repository to get the version tags of.
     """
 
-    # Get the raw tag info
-    raw_tag_info = get_raw_info().json
+    # Get the requested repository
+    success, repo_key = get_requested_repository()
+    if not success:
+        return repo_key  # This is the error response
 
-    if raw_tag_info.get("status", "ERROR") == "OK":
-        # Parse response text as JSON
-        json_txt = ujson.loads(raw_tag_info.get("raw_info"))
+    # Get the version tags
+    success, tag_table = fetch_tags(repo_key)
+    if not success:
+        return tag_table  # This is the error response
 
-        # Get version tags only and return
-        return make_json("OK", 200, count=len(json_txt), versions=[entry["name"] for entry in json_txt])
-    else:
-        return make_exception(
-            code=raw_tag_info.get("code", 500),
-            name=raw_tag_info.get("name", "Fetch Error"),
-            description=raw_tag_info.get("description")
-        )
+    # Get version tags only and return
+    return make_json(
+        "OK",
+        200,
+        cache_key=get_tags_cache_key(repo_key),
+        source=tag_table,
+        build=lambda: {"count": len(tag_table), "versions": list(tag_table.names)}
+    )
 
 
 @application.route("/check-if-have-new-version")
@@ -148,9 +742,16 @@ def check_if_have_new_version():
     """
     Checks if there is a new version that is newer than the current version.
 
+    Optionally accepts `repo`, the key of the tracked repository to check against.
+
     Note: this assumes that the version string is prefixed with a `v`.
     """
 
+    # Get the requested repository
+    success, repo_key = get_requested_repository()
+    if not success:
+        return repo_key  # This is the error response
+
     # Get current version requested
     current_version = request.args.get("current-version", None)
     if current_version is None:
@@ -169,42 +770,84 @@ def check_if_have_new_version():
         )
 
     # Get all version tags
-    versions_json = get_versions().json
+    success, tag_table = fetch_tags(repo_key)
 
     # Check if fetched successfully
-    if versions_json.get("status", "ERROR") == "ERROR":
-        return make_exception(
-            code=versions_json.get("code", 500),
-            name=versions_json.get("name", "Fetch Error"),
-            description=versions_json.get("description")
-        )
-
-    # Check if there are any version tags
-    num_tags = versions_json.get("count", 0)
+    if not success:
+        return tag_table  # This is the error response
 
     try:
-        newest_version = semver.VersionInfo.parse(current_version[1:])  # Tag must be at least the current version
+        current_version_info = semver.VersionInfo.parse(current_version[1:])
     except ValueError as e:
         return make_exception(code=400, name="Invalid Request", description=str(e))
 
-    if num_tags != 0:
-        # Get the version tags
-        versions = versions_json.get("versions")
-
-        # Get latest newer tag in terms of semver version
-        for i in range(num_tags):
-            version = semver.VersionInfo.parse(versions[i][1:])
-            if newest_version.compare(version) == -1:  # Latest tag is smaller than the tag considered
-                newest_version = version
-
-    # Add the missing "v" in front of the version
-    newest_version = "v" + str(newest_version)
+    # Get latest newer tag in terms of semver version (using the versions that were parsed when the tags were fetched)
+    newest_version = tag_table.get_newest_version(minimum=current_version_info)
 
     # Check if there was a newer tag
-    if newest_version == current_version:
+    if newest_version is None:
         return make_json("OK", 200, is_latest=True)
     else:
-        return make_json("OK", 200, is_latest=False, newer_tag=newest_version)
+        # Add the missing "v" in front of the version
+        return make_json("OK", 200, is_latest=False, newer_tag="v" + str(newest_version))
+
+
+@application.route("/upstream-status")
+def get_upstream_status():
+    """
+    Gets the state of the GitHub API circuit breaker and the remaining GitHub rate limit budget.
+    """
+
+    return make_json("OK", 200, **github.get_status())
+
+
+@application.route("/telemetry")
+def get_telemetry():
+    """
+    Gets the counts of version checks and FFmpeg downloads.
+
+    Optionally accepts `days`, the number of most recent days (including today) to count over; by default all days are
+    counted. Only counts that have been written to the telemetry database are included, and only the largest grouped
+    hit counts are listed.
+    """
+
+    path = application.config.get("TELEMETRY_DB")
+    if not path:
+        return make_exception(code=404, name="Not Found", description="Telemetry is not enabled.")
+
+    # Get the first day to count from
+    since = None
+    days = request.args.get("days")
+    if days is not None:
+        if not days.isdecimal() or int(days) == 0:
+            return make_exception(
+                code=400,
+                name="Invalid Request",
+                description=f"Invalid number of days '{days}'. Must be a positive integer."
+            )
+
+        days = min(int(days), 36500)  # Counting over more than a century is the same as counting over all days
+        since = datetime.datetime.now(datetime.timezone.utc).date() - datetime.timedelta(days=days - 1)
+
+    # Summarise the successful version checks by version, and the successful downloads by platform
+    versions = telemetry.get_aggregates(
+        path, ["version"], since=since, route="/check-if-have-new-version", successful_only=True
+    )
+    downloads = telemetry.get_aggregates(
+        path, ["platform"], since=since, route="/download-ffmpeg", successful_only=True
+    )
+    hits = telemetry.get_aggregates(
+        path, ["route", "platform", "version", "status"], since=since, limit=TELEMETRY_MAX_HITS
+    )
+
+    return make_json(
+        "OK",
+        200,
+        since=since.isoformat() if since else None,
+        versions={row["version"]: row["count"] for row in versions},
+        downloads={row["platform"]: row["count"] for row in downloads},
+        hits=hits
+    )
 
 
 @application.route("/get-api-server-version")
@@ -224,11 +867,16 @@ def download_ffmpeg():
     Expects two arguments.
     - The first is `platform`, which can either be "MACOS" or "WINDOWS".
     - The second is `signature_needed`, which can either be "true" or "false".
+
+    Optionally accepts `current_hash`, the SHA-256 of the client's current FFmpeg bundle. If a delta patch from that
+    bundle is available and smaller than the full bundle, the patch is sent instead, with the `X-Delta-Base` and
+    `X-Target-SHA256` headers set.
     """
 
     # Get arguments
     platform_string = request.args.get("platform", "").upper()
     signature_needed = request.args.get("signature_needed", "FALSE").upper()
+    current_hash = request.args.get("current_hash", "").lower()
 
     # If the platform is missing or invalid return an error
     if platform_string == "":
@@ -252,30 +900,30 @@ def download_ffmpeg():
             description=f"Invalid signature option '{signature_needed}'. Must be either 'TRUE' or 'FALSE'."
         )
 
-    # Try and read the FFmpeg signatures from cache
-    success, ffmpeg_signatures = get_from_cache("ffmpeg_signatures", 3600)  # 1 day
-    if not success:
-        # Read FFmpeg signatures from files
-        ffmpeg_signatures = {}
-        with open("data/ffmpeg/ffmpeg-5.1.1-MACOS.zip.sha256") as p:  # `p` for file pointer
-            ffmpeg_signatures["MACOS"] = p.read().strip()
-
-        with open("data/ffmpeg/ffmpeg-5.1.1-WINDOWS.zip.sha256") as p:
-            ffmpeg_signatures["WINDOWS"] = p.read().strip()
-
-        # Cache the signatures
-        add_to_cache("ffmpeg_signatures", ffmpeg_signatures)
+    # If `current_hash` is given but is not a SHA-256 hex digest return an error
+    if current_hash != "" and re.fullmatch("[0-9a-f]{64}", current_hash) is None:
+        return make_exception(
+            code=400,
+            name="Invalid Request",
+            description=f"Invalid hash '{current_hash}'. Must be a SHA-256 hex digest."
+        )
 
     # Get required information
     if signature_needed == "TRUE":
         return make_json(
             "OK",
             200,
-            signature=ffmpeg_signatures[platform_string]
+            signature=get_ffmpeg_signatures()[platform_string]
         )
     else:
+        # Send a delta patch if the client already has an older FFmpeg bundle
+        if current_hash != "":
+            patch_response = send_ffmpeg_patch(platform_string, current_hash)
+            if patch_response is not None:
+                return patch_response
+
         # Send FFmpeg ZIP files
-        return send_from_directory("data/ffmpeg", f"ffmpeg-5.1.1-{platform_string}.zip")
+        return send_data_file("ffmpeg", f"ffmpeg-{FFMPEG_VERSION}-{platform_string}.zip")
 
 
 @application.route("/download-audio-resource")
@@ -293,26 +941,15 @@ def download_audio_resource():
             description=f"Invalid signature option '{signature_needed}'. Must be either 'TRUE' or 'FALSE'."
         )
 
-    # Try and read the signature from cache
-    cache_key = f"audio_resource_signature"
-    success, audio_resource_signature = get_from_cache(cache_key, 3600)  # 1 day
-    if not success:
-        # Read signature from file
-        with open(f"data/audio/Breakfast.wav.sha256", "r") as p:
-            audio_resource_signature = p.read().strip()
-
-        # Cache the signature
-        add_to_cache(f"audio_resource_signature", audio_resource_signature)
-
     # Get required information
     if signature_needed == "TRUE":
         return make_json(
             "OK",
             200,
-            signature=audio_resource_signature
+            signature=get_audio_resource_signature()
         )
     else:
-        return send_from_directory("data/audio", f"Breakfast.wav")
+        return send_data_file("audio", "Breakfast.wav")
 
 
 @application.route("/test-api-server-get")
@@ -359,6 +996,10 @@ def make_exception(e=None, code=None, name=None, description=None):
     if description is None:
         description = e.description
 
+    # Record the error for the access log
+    if has_request_context():
+        g.error = {"name": name, "description": description}
+
     # Specially handle the "429 Too Many Requests" error
     if code == 429:
         return make_json("TOO MANY REQUESTS", 429, code=429, name=name, description=description)
@@ -369,10 +1010,17 @@ def make_exception(e=None, code=None, name=None, description=None):
 
 @application.errorhandler(405)
 def method_not_allowed_error_handler(_):
+    description = f"The '{request.method}' method is not allowed for the requested URL."
+    g.error = {"name": "Method Not Allowed", "description": description}
     return make_json(
         "METHOD NOT ALLOWED",
         405,
         code=405,
         name="Method Not Allowed",
-        description=f"The '{request.method}' method is not allowed for the requested URL."
+        description=description
     )
+
+
+# BACKGROUND TASKS
+if application.config["TAG_REFRESH_SCHEDULER"]:
+    start_tag_refresh_scheduler()
@@ -0,0 +1,67 @@
+"""
+compression.py
+Description: Response body compression for the encodings that the client accepts.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import gzip
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Zstandard is optional
+    zstandard = None
+
+# CONSTANTS
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 10
+
+# Supported encodings, in order of preference when the client accepts several equally
+ENCODINGS = [encoding for encoding, module in [("br", brotli), ("zstd", zstandard), ("gzip", gzip)] if module]
+
+
+# HELPER FUNCTIONS
+def choose_encoding(accept_encodings):
+    """
+    Chooses the best supported encoding out of the client's accepted encodings.
+
+    `accept_encodings` is the parsed `Accept-Encoding` header (i.e. `request.accept_encodings`). Returns `None` if the
+    client does not accept any supported encoding.
+    """
+
+    return accept_encodings.best_match(ENCODINGS)
+
+
+def compress(data, encoding):
+    """
+    Compresses the data using the given encoding.
+    """
+
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+    raise ValueError(f"Unsupported encoding '{encoding}'")
@@ -0,0 +1,231 @@
+"""
+ffmpeg_delta.py
+Description: Binary delta patches between FFmpeg bundle versions.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import hashlib
+import os
+import re
+import struct
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+# CONSTANTS
+PATCH_MAGIC = b"ATDELTA1"
+PATCH_HEADER = struct.Struct(">8sQ32s")  # Magic, target size, target SHA-256
+COPY_OP = struct.Struct(">cQI")  # Opcode, source offset, length
+INSERT_OP = struct.Struct(">cI")  # Opcode, length (followed by the inserted bytes)
+
+BLOCK_SIZE = 1024  # Spacing of the indexed source positions
+KEY_SIZE = 32  # Number of bytes used to look up a candidate match
+MIN_MATCH = 64  # Shortest match that is worth a copy operation
+
+SIGNATURE_FILE_REGEX = re.compile(r"ffmpeg-(?P<version>.+)-(?P<platform>[A-Z]+)\.zip\.sha256")
+PATCHES_DIR_NAME = "patches"
+
+
+# HELPER FUNCTIONS
+def make_patch(source, target):
+    """
+    Creates a patch that turns the `source` bytes into the `target` bytes.
+
+    The patch is a sequence of "copy a range of the source" and "insert these bytes" operations, found by indexing the
+    source at fixed intervals and greedily extending every match. The operations are then compressed with zlib.
+    """
+
+    # Index the source at every block boundary
+    index = {}
+    for offset in range(0, len(source) - KEY_SIZE + 1, BLOCK_SIZE):
+        index.setdefault(source[offset:offset + KEY_SIZE], offset)
+
+    ops = []
+    literal_start = 0
+    i = 0
+    target_size = len(target)
+
+    while i + KEY_SIZE <= target_size:
+        offset = index.get(target[i:i + KEY_SIZE])
+        if offset is None:
+            i += 1
+            continue
+
+        # Extend the match backwards into the pending literal bytes
+        start, source_start = i, offset
+        while start > literal_start and source_start > 0 and target[start - 1] == source[source_start - 1]:
+            start -= 1
+            source_start -= 1
+
+        # Extend the match forwards, a block at a time and then byte by byte
+        end, source_end = i + KEY_SIZE, offset + KEY_SIZE
+        while target[end:end + BLOCK_SIZE] == source[source_end:source_end + BLOCK_SIZE] and end < target_size:
+            step = min(BLOCK_SIZE, target_size - end, len(source) - source_end)
+            if step == 0:
+                break
+            end += step
+            source_end += step
+        while end < target_size and source_end < len(source) and target[end] == source[source_end]:
+            end += 1
+            source_end += 1
+
+        if end - start < MIN_MATCH:
+            i += 1
+            continue
+
+        if start > literal_start:
+            ops.append(INSERT_OP.pack(b"I", start - literal_start) + target[literal_start:start])
+        ops.append(COPY_OP.pack(b"C", source_start, end - start))
+
+        i = literal_start = end
+
+    if literal_start < target_size:
+        ops.append(INSERT_OP.pack(b"I", target_size - literal_start) + target[literal_start:])
+
+    header = PATCH_HEADER.pack(PATCH_MAGIC, target_size, hashlib.sha256(target).digest())
+    return header + zlib.compress(b"".join(ops), 9)
+
+
+def apply_patch(source, patch):
+    """
+    Applies a patch created by `make_patch` to the `source` bytes.
+
+    Raises a `ValueError` if the patch is malformed or if the result does not match the target's SHA-256.
+    """
+
+    try:
+        magic, target_size, target_hash = PATCH_HEADER.unpack_from(patch)
+        if magic != PATCH_MAGIC:
+            raise ValueError("Not an FFmpeg delta patch")
+
+        ops = zlib.decompress(patch[PATCH_HEADER.size:])
+        target = bytearray()
+        i = 0
+
+        while i < len(ops):
+            if ops[i:i + 1] == b"C":
+                _, offset, length = COPY_OP.unpack_from(ops, i)
+                target += source[offset:offset + length]
+                i += COPY_OP.size
+            elif ops[i:i + 1] == b"I":
+                _, length = INSERT_OP.unpack_from(ops, i)
+                i += INSERT_OP.size
+                target += ops[i:i + length]
+                i += length
+            else:
+                raise ValueError(f"Invalid patch operation at offset {i}")
+    except (struct.error, zlib.error) as e:
+        raise ValueError(f"Truncated or corrupt FFmpeg delta patch: {e}") from e
+
+    if len(target) != target_size or hashlib.sha256(target).digest() != target_hash:
+        raise ValueError("Patched bundle does not match the target signature")
+
+    return bytes(target)
+
+
+def find_bundles(ffmpeg_dir):
+    """
+    Finds all the FFmpeg bundles that have a signature file in the given directory.
+
+    Returns a dictionary mapping `(platform, signature)` to the bundle's version.
+    """
+
+    bundles = {}
+    for name in os.listdir(ffmpeg_dir):
+        match = SIGNATURE_FILE_REGEX.fullmatch(name)
+        if match is None:
+            continue
+
+        with open(os.path.join(ffmpeg_dir, name), "r") as p:  # `p` for file pointer
+            bundles[(match["platform"], p.read().strip().lower())] = match["version"]
+
+    return bundles
+
+
+def get_bundle_path(ffmpeg_dir, version, platform):
+    """
+    Gets the path to the FFmpeg bundle of the given version and platform.
+    """
+
+    return os.path.join(ffmpeg_dir, f"ffmpeg-{version}-{platform}.zip")
+
+
+def get_patch_path(ffmpeg_dir, source_version, target_version, platform):
+    """
+    Gets the path to the patch between the two FFmpeg bundle versions of the given platform.
+    """
+
+    return os.path.join(ffmpeg_dir, PATCHES_DIR_NAME, f"ffmpeg-{source_version}-to-{target_version}-{platform}.delta")
+
+
+def build_patch(source_path, target_path, patch_path):
+    """
+    Builds the patch between two bundle files, writing it atomically to `patch_path`.
+    """
+
+    with open(source_path, "rb") as p:
+        source = p.read()
+    with open(target_path, "rb") as p:
+        target = p.read()
+
+    patch = make_patch(source, target)
+
+    os.makedirs(os.path.dirname(patch_path), exist_ok=True)
+    temp_path = f"{patch_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as p:
+        p.write(patch)
+    os.replace(temp_path, patch_path)
+
+    return patch_path
+
+
+def build_patches(ffmpeg_dir, target_version, max_workers=None):
+    """
+    Builds the missing patches from every known bundle version to the target version, using a process pool.
+
+    Returns the list of patch paths that were built.
+    """
+
+    jobs = []
+    for (platform, _), version in find_bundles(ffmpeg_dir).items():
+        source_path = get_bundle_path(ffmpeg_dir, version, platform)
+        target_path = get_bundle_path(ffmpeg_dir, target_version, platform)
+        patch_path = get_patch_path(ffmpeg_dir, version, target_version, platform)
+
+        if version == target_version or os.path.exists(patch_path):
+            continue
+        if not (os.path.exists(source_path) and os.path.exists(target_path)):
+            continue
+
+        jobs.append((source_path, target_path, patch_path))
+
+    if not jobs:
+        return []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(build_patch, *zip(*jobs)))
+
+
+# MAIN CODE
+if __name__ == "__main__":
+    # Usage: python ffmpeg_delta.py <target version> [FFmpeg directory]
+    targetVersion = sys.argv[1]
+    ffmpegDir = sys.argv[2] if len(sys.argv) > 2 else "data/ffmpeg"
+
+    for builtPatch in build_patches(ffmpegDir, targetVersion):
+        print(f"Built '{builtPatch}' ({os.path.getsize(builtPatch)} bytes).")
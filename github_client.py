@@ -0,0 +1,295 @@
+"""
+github_client.py
+Description: GitHub API client with a circuit breaker and rate limit budget tracking.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import threading
+import time
+
+import ujson
+from requests import RequestException, Session
+
+# CONSTANTS
+CLOSED = "CLOSED"
+OPEN = "OPEN"
+HALF_OPEN = "HALF OPEN"
+
+
+# CLASSES
+class UpstreamUnavailableError(Exception):
+    """
+    Raised when a request to the upstream is not sent (because the circuit is open) or fails.
+    """
+
+    pass
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker that stops requests to the upstream after repeated failures.
+
+    After `failure_threshold` consecutive failures the circuit opens, and requests are rejected until the backoff time
+    has passed. The circuit then lets a single trial request through ("half open"); if it succeeds the circuit closes,
+    otherwise it opens again with double the previous backoff (up to `max_backoff`).
+    """
+
+    def __init__(self, failure_threshold=3, base_backoff=5, max_backoff=300):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.state = CLOSED
+        self.failures = 0
+        self.consecutive_opens = 0
+        self.open_until = 0
+
+        self._lock = threading.Lock()
+
+    def allow_request(self, now=None):
+        """
+        Checks whether a request may be sent to the upstream.
+        """
+
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+
+            if self.state == OPEN and now >= self.open_until:
+                self.state = HALF_OPEN  # Let this request through as the trial request
+                return True
+
+            return False
+
+    def record_success(self):
+        """
+        Records a successful request, closing the circuit.
+        """
+
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.consecutive_opens = 0
+
+    def record_failure(self, now=None, backoff=None):
+        """
+        Records a failed request, opening the circuit if needed.
+
+        If `backoff` is given, the circuit stays open for at least that long (e.g. until the rate limit resets).
+        Failures of requests that were already in flight when the circuit opened do not lengthen the backoff further.
+        """
+
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.state == OPEN:
+                if backoff is not None:
+                    self.open_until = max(self.open_until, now + backoff)
+                return
+
+            self.failures += 1
+
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold or backoff is not None:
+                self.consecutive_opens += 1
+                exponential_backoff = min(self.base_backoff * 2 ** (self.consecutive_opens - 1), self.max_backoff)
+
+                self.state = OPEN
+                self.open_until = now + max(exponential_backoff, backoff or 0)
+
+    def get_status(self, now=None):
+        """
+        Gets the state of the circuit breaker, for monitoring.
+        """
+
+        now = time.time() if now is None else now
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "consecutive_opens": self.consecutive_opens,
+            "retry_in": max(round(self.open_until - now, 3), 0) if self.state == OPEN else 0
+        }
+
+
+class RateLimitBudget:
+    """
+    Tracks the upstream's rate limit budget using the `X-RateLimit-*` response headers.
+    """
+
+    def __init__(self, low_fraction=0.2, max_stretch=10):
+        self.low_fraction = low_fraction  # Fraction of the budget below which refreshes are slowed down
+        self.max_stretch = max_stretch  # Largest factor by which refresh intervals are stretched
+
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+
+    def update(self, headers):
+        """
+        Updates the budget from the response headers, if they are present.
+        """
+
+        try:
+            self.limit = int(headers["X-RateLimit-Limit"])
+            self.remaining = int(headers["X-RateLimit-Remaining"])
+            self.reset = int(headers["X-RateLimit-Reset"])
+        except (KeyError, ValueError):
+            pass
+
+    def is_exhausted(self, now=None):
+        """
+        Checks whether the budget has run out and has not been reset yet.
+        """
+
+        now = time.time() if now is None else now
+        return self.remaining == 0 and self.reset is not None and now < self.reset
+
+    def get_ttl_multiplier(self):
+        """
+        Gets the factor by which cache TTLs and refresh intervals should be stretched to conserve the budget.
+
+        The factor is 1 until the remaining budget drops below the low fraction, then rises inversely with the remaining
+        budget, up to the maximum stretch.
+        """
+
+        if not self.limit or self.remaining is None:
+            return 1
+
+        fraction = self.remaining / self.limit
+        if fraction >= self.low_fraction:
+            return 1
+
+        return min(self.low_fraction / max(fraction, 1e-9), self.max_stretch)
+
+    def get_status(self):
+        """
+        Gets the rate limit budget, for monitoring.
+        """
+
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset": self.reset,
+            "ttl_multiplier": round(self.get_ttl_multiplier(), 3)
+        }
+
+
+class GitHubClient:
+    """
+    Client for the GitHub API that is guarded by a circuit breaker and tracks the rate limit budget.
+    """
+
+    def __init__(self, api_url="https://api.github.com", timeout=10, breaker=None, budget=None, session=None):
+        self.api_url = api_url.rstrip("/")
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.budget = budget or RateLimitBudget()
+        self.session = session or Session()
+
+        self._pages = {}  # Maps the page URL to its ETag, transformed entries and next page URL
+
+    def get(self, path, headers=None):
+        """
+        Sends a GET request to the GitHub API.
+
+        `path` may also be a full URL (e.g. from a `Link` header). Server errors, rate limiting (including GitHub's
+        secondary rate limits, which answer "403 Forbidden" with budget remaining) and connection problems count as
+        failures for the circuit breaker; a `Retry-After` header keeps the circuit open for at least that long. Raises
+        an `UpstreamUnavailableError` if the request was not sent or did not get a response.
+        """
+
+        if self.budget.is_exhausted():
+            raise UpstreamUnavailableError("GitHub rate limit exhausted")
+        if not self.breaker.allow_request():
+            raise UpstreamUnavailableError("GitHub circuit breaker is open")
+
+        url = path if "://" in path else f"{self.api_url}/{path.lstrip('/')}"
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except RequestException as e:
+            self.breaker.record_failure()
+            raise UpstreamUnavailableError(f"Could not reach GitHub: {e}") from e
+
+        self.budget.update(response.headers)
+
+        if self.budget.is_exhausted():
+            # Stay open until the budget resets, since further requests would only be rejected
+            self.breaker.record_failure(backoff=self.budget.reset - time.time())
+        elif response.status_code >= 500 or response.status_code in {403, 429}:
+            self.breaker.record_failure(backoff=get_retry_after(response.headers))
+        else:
+            self.breaker.record_success()
+
+        return response
+
+    def get_all(self, path, per_page=100, transform=list):
+        """
+        Gets every page of a list endpoint, following the `Link` headers.
+
+        Each page's entries are passed through `transform` (which must return a list), and only the transformed entries
+        are kept. Callers should use it to keep just the fields that they need.
+
+        Each page is requested with the ETag of its previous version. Unchanged pages are answered with "304 Not
+        Modified" (which does not count towards the rate limit), in which case the previously kept entries and next page
+        URL are used, since a 304 response need not repeat the `Link` header.
+
+        Returns a tuple of the last response and the combined transformed entries. The entries are `None` if a page was
+        not fetched successfully, in which case the response is that page's response.
+        """
+
+        url = f"{self.api_url}/{path.lstrip('/')}?per_page={per_page}"
+        entries = []
+
+        while url is not None:
+            previous_page = self._pages.get(url)
+            headers = {"If-None-Match": previous_page[0]} if previous_page else None
+
+            response = self.get(url, headers=headers)
+
+            if response.status_code == 304 and previous_page is not None:
+                _, page_entries, next_url = previous_page
+            elif response.status_code == 200:
+                page_entries = transform(ujson.loads(response.text))
+                next_url = response.links.get("next", {}).get("url")
+                if "ETag" in response.headers:
+                    self._pages[url] = (response.headers["ETag"], page_entries, next_url)
+            else:
+                return response, None
+
+            entries += page_entries
+            url = next_url
+
+        return response, entries
+
+    def get_status(self):
+        """
+        Gets the circuit breaker state and the rate limit budget, for monitoring.
+        """
+
+        return {"circuit_breaker": self.breaker.get_status(), "rate_limit": self.budget.get_status()}
+
+
+# HELPER FUNCTIONS
+def get_retry_after(headers):
+    """
+    Helper function that gets the number of seconds in the `Retry-After` header, or `None` if it is absent or invalid.
+    """
+
+    try:
+        return max(int(headers["Retry-After"]), 0)
+    except (KeyError, ValueError):
+        return None
@@ -0,0 +1,179 @@
+"""
+mirrors.py
+Description: Health-checked download mirror selection for redirecting large downloads away from the API server.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import hashlib
+import hmac
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlencode
+
+from requests import RequestException, head
+
+# CONSTANTS
+LATENCY_SMOOTHING = 0.3  # Weight given to the newest latency probe in the moving average
+MIN_LATENCY = 0.001  # Floor on the latency (in seconds) used for weighting, to avoid dividing by zero
+
+
+# CLASSES
+class Mirror:
+    """
+    A download mirror (or object store) that holds a copy of the `data` directory.
+    """
+
+    def __init__(self, name, base_url, weight=1, health_path="", secret=None, url_lifetime=300):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.weight = weight
+        self.health_path = health_path.lstrip("/")
+        self.secret = secret
+        self.url_lifetime = url_lifetime
+
+        self.healthy = False  # Mirrors are only used once a health check has passed
+        self.latency = None
+
+    def sign(self, path, expires):
+        """
+        Computes the signature for a time-limited URL to the given path.
+        """
+
+        message = f"{path}:{expires}".encode("UTF-8")
+        return hmac.new(self.secret.encode("UTF-8"), message, hashlib.sha256).hexdigest()
+
+    def url_for(self, path):
+        """
+        Gets the URL of the given path (relative to the `data` directory) on this mirror.
+
+        If the mirror has a secret, the URL is signed and expires after the mirror's URL lifetime.
+        """
+
+        url = f"{self.base_url}/{quote(path)}"
+
+        if self.secret is not None:
+            expires = int(time.time()) + self.url_lifetime
+            url += "?" + urlencode({"expires": expires, "signature": self.sign(path, expires)})
+
+        return url
+
+
+class MirrorPool:
+    """
+    A pool of mirrors that are health-checked and latency-probed in the background.
+    """
+
+    def __init__(self, mirrors, check_interval=30, timeout=2, config=None):
+        self.mirrors = mirrors
+        self.config = config  # Configuration that the pool was created from, if any
+        self.check_interval = check_interval
+        self.timeout = timeout
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, mirrors_config, check_interval=30, timeout=2):
+        """
+        Creates a mirror pool from a list of dictionaries, each holding the arguments for a `Mirror`.
+        """
+
+        mirrors = [Mirror(**mirror_config) for mirror_config in mirrors_config]
+        return cls(mirrors, check_interval, timeout, config=mirrors_config)
+
+    def check_mirror(self, mirror):
+        """
+        Checks whether a mirror is healthy, and updates its (smoothed) latency.
+        """
+
+        start = time.perf_counter()
+        try:
+            response = head(f"{mirror.base_url}/{mirror.health_path}", timeout=self.timeout, allow_redirects=True)
+            healthy = response.status_code < 400
+        except RequestException:
+            healthy = False
+        latency = time.perf_counter() - start
+
+        mirror.healthy = healthy
+        if healthy:
+            if mirror.latency is None:
+                mirror.latency = latency
+            else:
+                mirror.latency = LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * mirror.latency
+
+    def check_all(self):
+        """
+        Checks all the mirrors concurrently.
+        """
+
+        if not self.mirrors:
+            return
+
+        with ThreadPoolExecutor(max_workers=len(self.mirrors)) as executor:
+            list(executor.map(self.check_mirror, self.mirrors))
+
+    def start(self):
+        """
+        Starts the background health checking thread, if there are any mirrors to check.
+        """
+
+        if self._thread is not None or not self.mirrors:
+            return
+
+        def run():
+            while not self._stop_event.is_set():
+                self.check_all()
+                self._stop_event.wait(self.check_interval)
+
+        self._thread = threading.Thread(target=run, name="mirror-health-checker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background health checking thread.
+        """
+
+        self._stop_event.set()
+        self._thread = None
+
+    def choose(self):
+        """
+        Chooses a healthy mirror at random, weighted by its configured weight and inversely by its latency.
+
+        Returns `None` if no mirror is healthy.
+        """
+
+        healthy_mirrors = [mirror for mirror in self.mirrors if mirror.healthy and mirror.weight > 0]
+        if not healthy_mirrors:
+            return None
+
+        weights = [mirror.weight / max(mirror.latency or MIN_LATENCY, MIN_LATENCY) for mirror in healthy_mirrors]
+        return random.choices(healthy_mirrors, weights=weights)[0]
+
+    def url_for(self, path):
+        """
+        Gets the URL of the given path on a chosen mirror, or `None` if no mirror is healthy.
+        """
+
+        mirror = self.choose()
+        if mirror is None:
+            return None
+
+        return mirror.url_for(path)
@@ -0,0 +1,122 @@
+"""
+refresh_scheduler.py
+Description: Background scheduler that refreshes cached data before it expires.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# CLASSES
+class RefreshScheduler:
+    """
+    Scheduler that calls a refresh function for every registered key, shortly before that key's cache entry expires.
+
+    Refreshes run on a bounded thread pool. Each key's refresh interval is jittered, and the first refreshes are spread
+    out, so that keys registered together do not all hit the upstream at the same time.
+    """
+
+    def __init__(self, refresh_function, max_workers=4, jitter=0.1, refresh_ahead=0.8, poll_interval=1,
+                 interval_multiplier=None):
+        self.refresh_function = refresh_function
+        self.interval_multiplier = interval_multiplier  # Optional function giving a factor to stretch intervals by
+        self.jitter = jitter  # Fraction by which each interval is randomly lengthened or shortened
+        self.refresh_ahead = refresh_ahead  # Fraction of the TTL after which an entry is refreshed
+        self.poll_interval = poll_interval
+
+        self.entries = {}  # Maps the key to its TTL and the time that it is next due
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="refresh-worker")
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def register(self, key, ttl, now=None):
+        """
+        Registers a key to be refreshed every `ttl` seconds (less the refresh-ahead margin, plus or minus the jitter).
+
+        The first refresh happens at a random point within the first jitter window.
+        """
+
+        now = time.time() if now is None else now
+        with self._lock:
+            self.entries[key] = {"ttl": ttl, "next_due": now + random.uniform(0, self.jitter * ttl)}
+
+    def get_interval(self, ttl):
+        """
+        Gets a jittered refresh interval for the given TTL, stretched by the interval multiplier (if any).
+        """
+
+        multiplier = self.interval_multiplier() if self.interval_multiplier is not None else 1
+        return ttl * multiplier * self.refresh_ahead * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def run_due(self, now=None):
+        """
+        Starts refreshing every key that is due and is not already being refreshed.
+
+        Returns a dictionary mapping the keys that were started to their futures.
+        """
+
+        now = time.time() if now is None else now
+        started = {}
+
+        with self._lock:
+            for key, entry in self.entries.items():
+                if entry["next_due"] <= now and key not in self._in_flight:
+                    self._in_flight.add(key)
+                    started[key] = self._executor.submit(self._refresh, key)
+
+        return started
+
+    def _refresh(self, key):
+        try:
+            return self.refresh_function(key)
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
+                if key in self.entries:
+                    entry = self.entries[key]
+                    entry["next_due"] = time.time() + self.get_interval(entry["ttl"])
+
+    def start(self):
+        """
+        Starts the background thread that refreshes keys when they are due.
+        """
+
+        if self._thread is not None:
+            return
+
+        def run():
+            while not self._stop_event.is_set():
+                self.run_due()
+                self._stop_event.wait(self.poll_interval)
+
+        self._thread = threading.Thread(target=run, name="refresh-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread and waits for running refreshes to finish.
+        """
+
+        self._stop_event.set()
+        self._thread = None
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,172 @@
+"""
+static_manifest.py
+Description: Generates static update manifest files that a front proxy can serve without going through the API server.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import hashlib
+import os
+import shutil
+import uuid
+
+import semver
+import ujson
+
+# CONSTANTS
+CURRENT_LINK_NAME = "current"
+VERSION_DIR_PREFIX = "manifest-"
+TEMP_DIR_PREFIX = ".tmp-"
+
+
+# HELPER FUNCTIONS
+def get_latest_per_channel(versions):
+    """
+    Helper function that gets the latest version tag for each release channel.
+
+    The "stable" channel only considers versions without a pre-release component, whereas the "prerelease" channel
+    considers every version. Tags that are not valid semver strings (after removing the `v` prefix) are ignored.
+    """
+
+    latest = {"stable": None, "prerelease": None}
+    latest_info = {"stable": None, "prerelease": None}
+
+    for version in versions:
+        try:
+            version_info = semver.VersionInfo.parse(version[1:])
+        except ValueError:
+            continue
+
+        channels = ["prerelease"] if version_info.prerelease else ["stable", "prerelease"]
+        for channel in channels:
+            if latest_info[channel] is None or latest_info[channel].compare(version_info) == -1:
+                latest[channel] = version
+                latest_info[channel] = version_info
+
+    return latest
+
+
+def build_manifest(versions, ffmpeg_signatures, audio_resource_signature):
+    """
+    Helper function that builds the contents of the manifest files.
+
+    Each file's content mirrors the JSON that the equivalent API route returns, so that clients cannot tell whether
+    the answer came from the API server or from the front proxy.
+
+    Returns a dictionary mapping file names to their (encoded) contents.
+    """
+
+    files = {
+        "versions.json": {"status": "OK", "count": len(versions), "versions": versions},
+        "latest.json": {"status": "OK", **get_latest_per_channel(versions)},
+        "audio-resource.json": {"status": "OK", "signature": audio_resource_signature}
+    }
+
+    for platform, signature in ffmpeg_signatures.items():
+        files[f"ffmpeg-{platform}.json"] = {"status": "OK", "signature": signature}
+
+    return {name: ujson.dumps(content).encode("UTF-8") for name, content in files.items()}
+
+
+def get_manifest_digest(files):
+    """
+    Helper function that computes a short digest of the manifest files' names and contents.
+    """
+
+    hasher = hashlib.sha256()
+    for name in sorted(files):
+        hasher.update(name.encode("UTF-8") + b"\0" + files[name] + b"\0")
+
+    return hasher.hexdigest()[:16]
+
+
+def write_manifest(output_dir, files, keep=2):
+    """
+    Writes the manifest files into a versioned directory and atomically swaps the `current` symlink to point to it.
+
+    The files are first written into a temporary directory, which is then renamed into place. The symlink swap is done
+    by creating a new symlink and renaming it over the old one, so readers never see a partially written manifest.
+    Only the newest `keep` versioned directories are retained.
+
+    Returns the path to the versioned directory, or `None` if the manifest was unchanged.
+    """
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    digest = get_manifest_digest(files)
+    version_dir_name = VERSION_DIR_PREFIX + digest
+    version_dir = os.path.join(output_dir, version_dir_name)
+    current_link = os.path.join(output_dir, CURRENT_LINK_NAME)
+
+    # If the current manifest already has the same contents, there is nothing to do
+    if os.path.islink(current_link) and os.readlink(current_link) == version_dir_name:
+        return None
+
+    # Write the files into a temporary directory before moving it into place
+    if not os.path.isdir(version_dir):
+        temp_dir = os.path.join(output_dir, f"{TEMP_DIR_PREFIX}{digest}-{uuid.uuid4().hex}")  # Unique per writer
+        os.makedirs(temp_dir, exist_ok=True)
+
+        for name, content in files.items():
+            with open(os.path.join(temp_dir, name), "wb") as p:  # `p` for file pointer
+                p.write(content)
+                p.flush()
+                os.fsync(p.fileno())
+
+        try:
+            os.rename(temp_dir, version_dir)
+        except OSError:
+            # Another worker got there first with the same contents
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    # Atomically swap the symlink (using a relative target so that the directory can be moved around)
+    temp_link = os.path.join(output_dir, f"{TEMP_DIR_PREFIX}{CURRENT_LINK_NAME}-{uuid.uuid4().hex}")
+    os.symlink(version_dir_name, temp_link)
+    os.replace(temp_link, current_link)
+
+    # Prune older versioned directories
+    prune_old_versions(output_dir, keep)
+
+    return version_dir
+
+
+def prune_old_versions(output_dir, keep):
+    """
+    Helper function that removes all but the newest `keep` versioned manifest directories.
+
+    The directory that the `current` symlink points to is never removed.
+    """
+
+    current_link = os.path.join(output_dir, CURRENT_LINK_NAME)
+    current_target = os.readlink(current_link) if os.path.islink(current_link) else None
+
+    version_dirs = [
+        name for name in os.listdir(output_dir)
+        if name.startswith(VERSION_DIR_PREFIX) and name != current_target
+    ]
+
+    def get_mtime(name):
+        try:
+            return os.path.getmtime(os.path.join(output_dir, name))
+        except OSError:
+            return 0  # Already removed by another writer
+
+    version_dirs.sort(key=get_mtime, reverse=True)
+
+    # The current directory counts towards the number of directories kept
+    for name in version_dirs[max(keep - 1, 0):]:
+        shutil.rmtree(os.path.join(output_dir, name), ignore_errors=True)
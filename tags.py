@@ -0,0 +1,142 @@
+"""
+tags.py
+Description: Compact storage of the version tags fetched from GitHub.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import semver
+import ujson
+
+# CONSTANTS
+FIELDS = ("name", "commit.sha")  # Fields of each tag that are kept, in the order that they are output
+
+
+# CLASSES
+class TagTable:
+    """
+    Columnar table of version tags.
+
+    Only the fields that the API server uses are kept, as parallel tuples of names, commit SHAs and parsed semver
+    versions (`None` for tags that are not valid `v`-prefixed semver strings).
+    """
+
+    __slots__ = ("names", "shas", "version_keys")
+
+    def __init__(self, names, shas):
+        self.names = tuple(names)
+        self.shas = tuple(shas)
+        self.version_keys = tuple(parse_version(name) for name in self.names)
+
+    @classmethod
+    def from_raw_info(cls, raw_info):
+        """
+        Creates a tag table from the raw JSON text of GitHub's tags endpoint.
+        """
+
+        return cls.from_entries(ujson.loads(raw_info))
+
+    @classmethod
+    def from_entries(cls, entries):
+        """
+        Creates a tag table from the parsed entries of GitHub's tags endpoint.
+        """
+
+        return cls.from_pairs(get_name_sha_pairs(entries))
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """
+        Creates a tag table from `(name, commit SHA)` pairs, like those from `get_name_sha_pairs()`.
+        """
+
+        return cls([name for name, _ in pairs], [sha for _, sha in pairs])
+
+    def __len__(self):
+        return len(self.names)
+
+    def project(self, fields=FIELDS):
+        """
+        Gets the tags as a list of dictionaries, with only the given fields.
+
+        Dotted fields (like `commit.sha`) are output as nested dictionaries, just like in GitHub's response.
+        """
+
+        columns = {"name": self.names, "commit.sha": self.shas}
+        projected = [{} for _ in self.names]
+
+        for field in fields:
+            *parents, leaf = field.split(".")
+            for entry, value in zip(projected, columns[field]):
+                for parent in parents:
+                    entry = entry.setdefault(parent, {})
+                entry[leaf] = value
+
+        return projected
+
+    def get_newest_version(self, minimum=None):
+        """
+        Gets the newest valid version, which must be newer than `minimum` (if given).
+
+        Returns `None` if there is no such version.
+        """
+
+        newest = minimum
+        for version in self.version_keys:
+            if version is not None and (newest is None or newest.compare(version) == -1):
+                newest = version
+
+        return newest if newest is not minimum else None
+
+
+# HELPER FUNCTIONS
+def parse_version(name):
+    """
+    Helper function that parses a `v`-prefixed version tag, returning `None` if it is not valid semver.
+    """
+
+    if not name.startswith("v"):
+        return None
+
+    try:
+        return semver.VersionInfo.parse(name[1:])
+    except ValueError:
+        return None
+
+
+def get_name_sha_pairs(entries):
+    """
+    Helper function that keeps only the name and commit SHA of each of the parsed entries of GitHub's tags endpoint.
+    """
+
+    return [(entry["name"], entry.get("commit", {}).get("sha")) for entry in entries]
+
+
+def parse_fields(fields_string):
+    """
+    Helper function that parses a comma-separated list of fields.
+
+    The fields are returned without duplicates and in their output order, so that equivalent lists (which give the same
+    response) are equal. Raises a `ValueError` if any of the fields are unknown.
+    """
+
+    requested = {field.strip() for field in fields_string.split(",") if field.strip()}
+    for field in sorted(requested):
+        if field not in FIELDS:
+            raise ValueError(f"Invalid field '{field}'. Must be one of {', '.join(repr(f) for f in FIELDS)}.")
+
+    return tuple(field for field in FIELDS if field in requested)
@@ -0,0 +1,228 @@
+"""
+telemetry.py
+Description: Hit counters that are aggregated in memory and flushed to a SQLite database in batches.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import datetime
+import pathlib
+import sqlite3
+import threading
+import time
+
+# CONSTANTS
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hits (
+    day TEXT NOT NULL,
+    route TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    version TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, route, platform, version, status)
+)
+"""
+UPSERT = """
+INSERT INTO hits (day, route, platform, version, status, count) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (day, route, platform, version, status) DO UPDATE SET count = count + excluded.count
+"""
+COLUMNS = ("day", "route", "platform", "version", "status")
+BUSY_TIMEOUT = 5  # Seconds to wait for another worker's write to finish
+EPOCH = datetime.date(1970, 1, 1)
+
+
+# CLASSES
+class TelemetryCounters:
+    """
+    Hit counters, keyed by `(route, platform, version, status)` and bucketed by day.
+
+    Every thread counts hits in its own shard, so recording a hit never waits on other threads and does no I/O. A
+    background thread periodically collects the shards and adds their counts to the `hits` table of a SQLite database
+    in a single transaction. Each worker process has its own counters; since the counts are added to the database's
+    (instead of overwriting them), the workers' flushes sum up correctly.
+    """
+
+    def __init__(self, path, flush_interval=10):
+        self.path = path
+        self.flush_interval = flush_interval
+
+        self.dropped = 0  # Number of hits lost because they could not be written
+
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        connection = self._connect()
+        connection.execute("PRAGMA journal_mode = WAL")  # Lets the aggregates be read while counts are written
+        connection.execute(SCHEMA)
+        connection.commit()
+        connection.close()
+
+    def record(self, route, platform="", version="", status=200, now=None):
+        """
+        Counts a hit in the current thread's shard.
+        """
+
+        now = time.time() if now is None else now
+        key = (int(now // 86400), route, platform, version, status)  # Days are counted since the (UTC) epoch
+
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._add_shard()
+
+        with shard.lock:  # Only contended while the shard is being flushed
+            shard.counts[key] = shard.counts.get(key, 0) + 1
+
+    def flush(self):
+        """
+        Adds all the counts recorded so far to the database.
+        """
+
+        with self._shards_lock:
+            shards = self._shards
+            self._shards = [shard for shard in shards if shard.thread.is_alive()]  # Dead threads add no more hits
+
+        totals = {}
+        for shard in shards:
+            with shard.lock:
+                counts, shard.counts = shard.counts, {}
+
+            for key, count in counts.items():
+                totals[key] = totals.get(key, 0) + count
+
+        if not totals:
+            return
+
+        rows = [
+            ((EPOCH + datetime.timedelta(days=day)).isoformat(), route, platform, version, status, count)
+            for (day, route, platform, version, status), count in totals.items()
+        ]
+
+        with self._flush_lock:
+            try:
+                connection = self._connect()
+                try:
+                    with connection:
+                        connection.executemany(UPSERT, rows)
+                finally:
+                    connection.close()
+            except sqlite3.Error:
+                # The transaction was rolled back, so none of this batch was stored
+                self.dropped += sum(totals.values())
+
+    def start(self):
+        """
+        Starts the background flushing thread.
+        """
+
+        if self._thread is not None:
+            return
+
+        def run():
+            while not self._stop_event.wait(self.flush_interval):
+                self.flush()
+
+        self._thread = threading.Thread(target=run, name="telemetry-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """
+        Stops the background flushing thread, then flushes the remaining counts.
+        """
+
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+        self.flush()
+
+    def _add_shard(self):
+        shard = CounterShard(threading.current_thread())
+        self._local.shard = shard
+        with self._shards_lock:
+            self._shards.append(shard)
+
+        return shard
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+
+class CounterShard:
+    """
+    Counts of a single thread.
+    """
+
+    __slots__ = ("thread", "counts", "lock")
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.counts = {}
+        self.lock = threading.Lock()
+
+
+# HELPER FUNCTIONS
+def get_aggregates(path, group_by, since=None, route=None, successful_only=False, limit=None):
+    """
+    Helper function that sums the flushed hit counts, grouped by the given columns.
+
+    `since` is the earliest day (as a `datetime.date`) to include, `route` limits the counts to a single route, and
+    `successful_only` leaves out the hits of error responses. At most `limit` groups (if given) are returned, largest
+    first. The database is opened read-only. Returns a list of dictionaries, each with the grouped columns and the
+    `count`.
+    """
+
+    for column in group_by:
+        if column not in COLUMNS:
+            raise ValueError(f"Invalid column '{column}'. Must be one of {', '.join(repr(c) for c in COLUMNS)}.")
+
+    columns = ", ".join(group_by)
+    conditions = []
+    parameters = []
+
+    if since is not None:
+        conditions.append("day >= ?")
+        parameters.append(since.isoformat())
+    if route is not None:
+        conditions.append("route = ?")
+        parameters.append(route)
+    if successful_only:
+        conditions.append("status < 400")
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"SELECT {columns}, SUM(count) FROM hits {where} GROUP BY {columns} ORDER BY SUM(count) DESC, {columns}"
+    if limit is not None:
+        query += " LIMIT ?"
+        parameters.append(limit)
+
+    if not pathlib.Path(path).exists():
+        return []  # Nothing was flushed yet
+
+    connection = sqlite3.connect(f"{pathlib.Path(path).absolute().as_uri()}?mode=ro", uri=True, timeout=BUSY_TIMEOUT)
+    try:
+        rows = connection.execute(query, parameters).fetchall()
+    finally:
+        connection.close()
+
+    return [{**dict(zip(group_by, row[:-1])), "count": row[-1]} for row in rows]
@@ -19,9 +19,14 @@ OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 """
 
 # IMPORTS
+import time
+
 import pytest
 
-from application import application
+import application as api_server
+import github_client
+from application import application, limiter
+from tests.fake_github import FakeGitHub
 
 
 # TEST CONFIGURATION
@@ -30,6 +35,7 @@ def app():
     application.config.update({
         "TESTING": True,
     })
+    limiter.enabled = False  # The limiter's state was decided before `TESTING` was set
 
     yield application
 
@@ -37,3 +43,59 @@ def app():
 @pytest.fixture()
 def client(app):
     return app.test_client()
+
+
+@pytest.fixture()
+def fake_github(monkeypatch):
+    """
+    Starts a fake GitHub API server and points the API server at it, with short timeouts and backoffs.
+
+    The fake serves a few AudiTranscribe tags (including "v0.1.2" and "v0.1.1", with their real commit SHAs) and
+    starts without any faults.
+    """
+
+    server = FakeGitHub().start()
+    server.set_tags(api_server.AUDITRANSCRIBE_REPO, ["v0.3.0", "v0.2.0", "v0.1.2", "v0.1.1"], shas={
+        "v0.1.2": "716cbab35d290ec968f084d2243802f9ea7f018f",
+        "v0.1.1": "cbfd141de9e7c52299cc5116a6704ba7dd36f6f8"
+    })
+
+    monkeypatch.setattr(api_server, "github", github_client.GitHubClient(
+        api_url=server.url,
+        timeout=0.25,
+        breaker=github_client.CircuitBreaker(failure_threshold=2, base_backoff=0.5, max_backoff=2)
+    ))
+    api_server.cache.pop("tags:auditranscribe", None)
+
+    yield server
+
+    api_server.cache.pop("tags:auditranscribe", None)
+    server.stop()
+
+
+@pytest.fixture()
+def slow_assets(monkeypatch):
+    """
+    Slows down the API server's reads of the files in the `data` directory.
+
+    Returns a function that sets the delay (in seconds) added to every file opened or sent.
+    """
+
+    delay = {"seconds": 0}
+    original_send_from_directory = api_server.send_from_directory
+
+    def slow_open(*args, **kwargs):
+        time.sleep(delay["seconds"])
+        return open(*args, **kwargs)
+
+    def slow_send_from_directory(*args, **kwargs):
+        time.sleep(delay["seconds"])
+        return original_send_from_directory(*args, **kwargs)
+
+    monkeypatch.setattr(api_server, "open", slow_open, raising=False)
+    monkeypatch.setattr(api_server, "send_from_directory", slow_send_from_directory)
+
+    def set_delay(seconds):
+        delay["seconds"] = seconds
+
+    return set_delay
@@ -0,0 +1,200 @@
+"""
+fake_github.py
+Description: Local fake of the GitHub tags API, with scriptable latency, errors, pagination and ETags.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import hashlib
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import ujson
+
+# CONSTANTS
+TAGS_PATH_REGEX = re.compile(r"/repos/(?P<repo>[^/]+/[^/]+)/tags")
+HANG = "HANG"  # Scripted action that makes the server hang instead of answering
+
+
+# CLASSES
+class FakeGitHub:
+    """
+    Fake GitHub API server that serves the tags endpoint on a local port.
+
+    Faults can be injected by setting the attributes:
+    - `latency`: seconds to wait before answering every request.
+    - `error_rate` and `error_status`: fraction of requests answered with the error status (seeded, so repeatable).
+    - `script`: list of actions used (in order) for the next requests; each is a status code to answer with, `HANG`
+      to hang for `hang_time` seconds, or `None` to answer normally.
+    - `rate_limit` and `rate_remaining`: the rate limit budget; requests beyond it get "403 Forbidden".
+    - `link_on_304`: whether "304 Not Modified" responses repeat the `Link` header (HTTP does not require it).
+    """
+
+    def __init__(self, per_page=30, seed=0):
+        self.repos = {}  # Maps the repository name to its tag entries
+        self.per_page = per_page
+
+        self.latency = 0
+        self.error_rate = 0
+        self.error_status = 500
+        self.script = []
+        self.hang_time = 5
+        self.link_on_304 = True
+
+        self.rate_limit = 5000
+        self.rate_remaining = 5000
+        self.rate_reset = int(time.time()) + 3600
+
+        self.requests = []  # Log of `(path, status code)` for every request answered
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.server.block_on_close = False
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def set_tags(self, repo, names, shas=None):
+        """
+        Sets the tags of a repository.
+
+        `shas` optionally maps tag names to their commit SHAs; a commit SHA is generated for every other tag.
+        """
+
+        shas = shas or {}
+
+        self.repos[repo] = [
+            {
+                "name": name,
+                "zipball_url": f"https://api.github.com/repos/{repo}/zipball/refs/tags/{name}",
+                "tarball_url": f"https://api.github.com/repos/{repo}/tarball/refs/tags/{name}",
+                "commit": {"sha": shas.get(name) or hashlib.sha1(name.encode("UTF-8")).hexdigest(), "url": "..."},
+                "node_id": "..."
+            }
+            for name in names
+        ]
+
+    def count_requests(self, status_code=None):
+        """
+        Counts the requests answered (with the given status code, if any).
+        """
+
+        return len([1 for _, status in self.requests if status_code is None or status == status_code])
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, handler):
+        # Work out what to do with the request
+        with self._lock:
+            action = self.script.pop(0) if self.script else None
+            if action is None and self._random.random() < self.error_rate:
+                action = self.error_status
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if action == HANG:
+            time.sleep(self.hang_time)
+            return  # The client should have given up by now
+
+        if action is not None:
+            self.respond(handler, action, {"message": "Injected fault"})
+            return
+
+        # Serve the tags, with pagination
+        url = urlparse(handler.path)
+        match = TAGS_PATH_REGEX.fullmatch(url.path)
+        if match is None or match["repo"] not in self.repos:
+            self.respond(handler, 404, {"message": "Not Found"})
+            return
+
+        query = parse_qs(url.query)
+        per_page = int(query.get("per_page", [self.per_page])[0])
+        page = int(query.get("page", [1])[0])
+
+        entries = self.repos[match["repo"]]
+        body = ujson.dumps(entries[(page - 1) * per_page:page * per_page]).encode("UTF-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+        headers = {"ETag": etag}
+        if page * per_page < len(entries):
+            headers["Link"] = f'<{self.url}{url.path}?per_page={per_page}&page={page + 1}>; rel="next"'
+
+        # Unchanged pages do not count towards the rate limit, but are still rejected once it is exhausted
+        not_modified = handler.headers.get("If-None-Match") == etag
+        with self._lock:
+            rate_limited = self.rate_remaining == 0
+            if not rate_limited and not not_modified:
+                self.rate_remaining -= 1
+
+        if rate_limited:
+            self.respond(handler, 403, {"message": "API rate limit exceeded"})
+        elif not_modified:
+            if not self.link_on_304:
+                headers.pop("Link", None)
+            self.respond(handler, 304, None, headers)
+        else:
+            self.respond(handler, 200, body, headers)
+
+    def respond(self, handler, status_code, body, headers=None):
+        self.requests.append((handler.path, status_code))
+
+        if isinstance(body, dict):
+            body = ujson.dumps(body).encode("UTF-8")
+
+        try:
+            handler.send_response(status_code)
+            handler.send_header("X-RateLimit-Limit", str(self.rate_limit))
+            handler.send_header("X-RateLimit-Remaining", str(self.rate_remaining))
+            handler.send_header("X-RateLimit-Reset", str(self.rate_reset))
+            for name, value in (headers or {}).items():
+                handler.send_header(name, value)
+
+            if body is None:
+                handler.end_headers()
+                return
+
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up waiting
@@ -0,0 +1,94 @@
+"""
+test_access_log.py
+Description: Tests for the structured access log.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import os
+
+import ujson
+
+import access_log
+import application
+
+
+# HELPERS
+def read_records(path):
+    with open(path, "r") as f:
+        return [ujson.loads(line) for line in f]
+
+
+# TESTS
+def test_access_logger(tmp_path):
+    """Tests the batching, dropping, sampling and rotation of the access logger."""
+
+    path = str(tmp_path / "access.log")
+    logger = access_log.AccessLogger(path, max_queue_size=5, batch_size=2, max_bytes=200, backup_count=2,
+                                     sample_rates={"/versions": 0})
+
+    # Records beyond the queue size should be dropped instead of blocking
+    for i in range(7):
+        logger.log({"route": "/get-raw-info", "status": 200, "i": i})
+    assert logger.dropped == 2
+
+    # Sampled out records should not be queued, but errors should always be
+    assert logger.log({"route": "/versions", "status": 200}) is False
+    logger.flush()
+    assert logger.log({"route": "/versions", "status": 500}) is True
+
+    # The background writer should write the remaining records when stopped
+    logger.start()
+    logger.stop()
+
+    records = []
+    for name in [f"{path}.2", f"{path}.1", path]:
+        if os.path.exists(name):
+            records += read_records(name)
+
+    assert [record.get("i") for record in records] == [0, 1, 2, 3, 4, None]
+    assert records[-1]["status"] == 500
+    assert os.path.exists(f"{path}.1")
+    assert not os.path.exists(f"{path}.3")
+
+
+def test_request_logging(client, tmp_path):
+    """Tests that requests are recorded in the access log."""
+
+    path = str(tmp_path / "access.log")
+    application.application.config["ACCESS_LOG_FILE"] = path
+
+    try:
+        client.get("/download-audio-resource?signature_needed=true")
+        client.get("/download-audio-resource?signature_needed=true")
+        client.get("/download-audio-resource?signature_needed=maybe")
+        client.post("/get-api-server-version")
+    finally:
+        application.application.config["ACCESS_LOG_FILE"] = None
+        application.get_access_logger()  # Stops the logger, which writes out the queued records
+
+    records = read_records(path)
+    assert [record["status"] for record in records] == [200, 200, 400, 405]
+    assert records[0]["route"] == "/download-audio-resource"
+    assert records[0]["bytes"] > 0
+    assert records[0]["latency_ms"] >= 0
+    assert records[1]["cache"] == {"audio_resource_signature": "hit"}
+    assert records[2]["error"]["name"] == "Invalid Request"
+    assert records[3]["error"] == {
+        "name": "Method Not Allowed",
+        "description": "The 'POST' method is not allowed for the requested URL."
+    }
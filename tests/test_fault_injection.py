@@ -0,0 +1,181 @@
+"""
+test_fault_injection.py
+Description: Tests of the API server when the upstream or the disk is slow or failing.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import time
+
+import application
+import github_client
+import tags
+from tests.fake_github import HANG
+
+
+# HELPER FUNCTIONS
+def timed_get(client, url):
+    """
+    Helper function that sends a GET request, returning the response and the time taken (in seconds).
+    """
+
+    start = time.perf_counter()
+    response = client.get(url)
+    return response, time.perf_counter() - start
+
+
+def expire_tags():
+    """
+    Helper function that marks the cached AudiTranscribe tags as expired, without removing them.
+    """
+
+    application.cache["tags:auditranscribe"] = (0, application.cache["tags:auditranscribe"][1])
+
+
+# TESTS
+def test_hanging_upstream(client, fake_github):
+    """Tests that a hanging upstream does not hold up requests once the circuit breaker has opened."""
+
+    fake_github.script = [HANG] * 10
+    fake_github.hang_time = 2
+
+    # Requests are bounded by the timeout, and fail quickly once the circuit opens
+    latencies = []
+    for _ in range(20):
+        response, latency = timed_get(client, "/versions")
+        assert response.json["code"] == 503
+        latencies.append(latency)
+
+    assert max(latencies) < 1
+    assert sorted(latencies[2:])[-1] < 0.1  # Worst case (i.e. p99) after the circuit opened
+    assert fake_github.script == [HANG] * 8
+
+    # Once the upstream recovers, the trial request after the backoff closes the circuit again
+    fake_github.script = []
+    time.sleep(0.6)
+
+    response = client.get("/versions")
+    assert response.json["count"] == 4
+    assert application.github.breaker.state == github_client.CLOSED
+
+
+def test_slow_upstream_with_stale_cache(client, fake_github):
+    """Tests that cached tags are served quickly while the upstream is slow."""
+
+    client.get("/versions")
+    expire_tags()
+
+    fake_github.latency = 2
+
+    latencies = []
+    for _ in range(20):
+        response, latency = timed_get(client, "/get-raw-info?fields=name")
+        assert response.json["status"] == "OK"
+        assert [tag["name"] for tag in tags.TagTable.from_raw_info(response.json["raw_info"]).project()] == \
+               ["v0.3.0", "v0.2.0", "v0.1.2", "v0.1.1"]
+        latencies.append(latency)
+
+    assert max(latencies) < 1
+    assert sorted(latencies[2:])[-1] < 0.1
+
+
+def test_upstream_errors(client, fake_github):
+    """Tests that stale tags are served, and that errors are not cached, while the upstream returns errors."""
+
+    fake_github.error_rate = 1
+
+    # Without cached tags, the upstream's error is passed on, and nothing is cached
+    response = client.get("/versions")
+    assert response.json["code"] == 500
+    assert "tags:auditranscribe" not in application.cache
+
+    # With expired cached tags, the stale tags are served instead
+    fake_github.error_rate = 0
+    client.get("/versions")
+    expire_tags()
+
+    fake_github.error_rate = 0.5
+    for _ in range(10):
+        response = client.get("/check-if-have-new-version?current-version=v0.2.0")
+        assert response.json == {"status": "OK", "is_latest": False, "newer_tag": "v0.3.0"}
+
+
+def test_rate_limit_exhausted(client, fake_github):
+    """Tests that stale tags are served, without contacting the upstream, once the rate limit is exhausted."""
+
+    client.get("/versions")
+    expire_tags()
+
+    fake_github.rate_remaining = 0
+    for _ in range(5):
+        response = client.get("/versions")
+        assert response.json["count"] == 4
+
+    # Only the first request should have reached the upstream
+    assert fake_github.count_requests(403) == 1
+    assert fake_github.count_requests() == 2
+
+    response = client.get("/upstream-status")
+    assert response.json["rate_limit"]["remaining"] == 0
+    assert response.json["circuit_breaker"]["state"] == github_client.OPEN
+
+
+def test_limiter_during_upstream_faults(client, fake_github):
+    """Tests that rate-limited requests are rejected quickly, without reaching the upstream."""
+
+    fake_github.latency = 0.2
+    application.limiter.enabled = True
+    application.limiter.reset()
+
+    try:
+        latencies = {}
+        for _ in range(10):
+            response, latency = timed_get(client, "/versions")
+            latencies.setdefault(response.status_code, []).append(latency)
+
+        assert len(latencies[200]) == 2
+        assert len(latencies[429]) == 8
+        assert max(latencies[429]) < 0.1
+        assert fake_github.count_requests() == 1
+    finally:
+        application.limiter.enabled = False
+        application.limiter.reset()
+
+
+def test_slow_disk(client, slow_assets):
+    """Tests that signatures are read from the disk once, and that downloads are correct when the disk is slow."""
+
+    application.cache.pop("ffmpeg_signatures", None)
+    application.cache.pop("audio_resource_signature", None)
+    slow_assets(0.2)
+
+    # Only the first signature request should read from the disk
+    response, latency = timed_get(client, "/download-ffmpeg?platform=WINDOWS&signature_needed=true")
+    assert latency >= 0.2
+    with open("data/ffmpeg/ffmpeg-5.1.1-WINDOWS.zip.sha256", "r") as f:
+        assert response.json["signature"] == f.read().strip()
+
+    for _ in range(5):
+        response, latency = timed_get(client, "/download-ffmpeg?platform=MACOS&signature_needed=true")
+        assert latency < 0.1
+        assert response.json["status"] == "OK"
+
+    # Downloads are slower, but complete
+    response, latency = timed_get(client, "/download-audio-resource")
+    assert latency >= 0.2
+    with open("data/audio/Breakfast.wav", "rb") as f:
+        assert response.data == f.read()
@@ -0,0 +1,129 @@
+"""
+test_ffmpeg_delta.py
+Description: Tests for the FFmpeg delta patches.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import hashlib
+import os
+import random
+
+import pytest
+
+import application
+import ffmpeg_delta
+
+
+# HELPERS
+@pytest.fixture()
+def ffmpeg_dir(tmp_path):
+    """Creates an FFmpeg directory with an older and the current macOS bundle, plus the Windows signature."""
+
+    rng = random.Random(42)
+    old_bundle = bytes(rng.getrandbits(8) for _ in range(200_000))
+    new_bundle = old_bundle[:50_000] + b"new FFmpeg build" * 100 + old_bundle[60_000:]
+
+    for version, bundle in [("5.0.0", old_bundle), (application.FFMPEG_VERSION, new_bundle)]:
+        (tmp_path / f"ffmpeg-{version}-MACOS.zip").write_bytes(bundle)
+        (tmp_path / f"ffmpeg-{version}-MACOS.zip.sha256").write_text(hashlib.sha256(bundle).hexdigest() + "\n")
+
+    (tmp_path / f"ffmpeg-{application.FFMPEG_VERSION}-WINDOWS.zip.sha256").write_text("0" * 64 + "\n")
+
+    yield tmp_path, old_bundle, new_bundle
+
+
+# TESTS
+def test_patch_round_trip():
+    """Tests that applying a patch reproduces the target exactly."""
+
+    source = os.urandom(100_000)
+    target = b"header" + source[:40_000] + os.urandom(5_000) + source[45_000:] + b"trailer"
+
+    patch = ffmpeg_delta.make_patch(source, target)
+    assert len(patch) < len(target) // 5
+    assert ffmpeg_delta.apply_patch(source, patch) == target
+
+    # Patches against unrelated data and empty data should also work
+    assert ffmpeg_delta.apply_patch(b"", ffmpeg_delta.make_patch(b"", target)) == target
+    assert ffmpeg_delta.apply_patch(source, ffmpeg_delta.make_patch(source, b"")) == b""
+
+    # Applying the patch to the wrong source should be detected
+    with pytest.raises(ValueError):
+        ffmpeg_delta.apply_patch(os.urandom(100_000), patch)
+
+    # Truncated or corrupt patches should be rejected
+    for malformed_patch in [patch[:20], patch[:len(patch) // 2], patch[:48] + b"not zlib data"]:
+        with pytest.raises(ValueError, match="Truncated or corrupt"):
+            ffmpeg_delta.apply_patch(source, malformed_patch)
+
+
+def test_build_patches(ffmpeg_dir):
+    """Tests that the missing patches are built in a process pool."""
+
+    directory, old_bundle, new_bundle = ffmpeg_dir
+
+    built = ffmpeg_delta.build_patches(str(directory), application.FFMPEG_VERSION, max_workers=1)
+    assert [os.path.basename(path) for path in built] == [f"ffmpeg-5.0.0-to-{application.FFMPEG_VERSION}-MACOS.delta"]
+
+    with open(built[0], "rb") as f:
+        assert ffmpeg_delta.apply_patch(old_bundle, f.read()) == new_bundle
+
+    # Patches that already exist should not be rebuilt
+    assert ffmpeg_delta.build_patches(str(directory), application.FFMPEG_VERSION) == []
+
+
+def test_download_ffmpeg_patch(client, monkeypatch, ffmpeg_dir):
+    """Tests that the download route sends a patch when the client has an older bundle."""
+
+    directory, old_bundle, new_bundle = ffmpeg_dir
+    old_hash = hashlib.sha256(old_bundle).hexdigest()
+    new_hash = hashlib.sha256(new_bundle).hexdigest()
+
+    monkeypatch.setattr(application, "FFMPEG_DIR", str(directory))
+    for key in ["ffmpeg_bundles", "ffmpeg_signatures"]:
+        monkeypatch.delitem(application.cache, key, raising=False)
+
+    try:
+        # The first request should fall back to the full bundle and start building the patch
+        response = client.get(f"/download-ffmpeg?platform=macOS&current_hash={old_hash}")
+        assert "X-Delta-Base" not in response.headers
+
+        for future in application.patch_builds.values():
+            future.result(timeout=60)
+
+        # The next request should get the patch
+        response = client.get(f"/download-ffmpeg?platform=macOS&current_hash={old_hash}")
+        assert response.status_code == 200
+        assert response.headers["X-Delta-Base"] == old_hash
+        assert response.headers["X-Target-SHA256"] == new_hash
+        assert ffmpeg_delta.apply_patch(old_bundle, response.data) == new_bundle
+
+        # Unknown hashes should get the full bundle
+        response = client.get(f"/download-ffmpeg?platform=macOS&current_hash={'0' * 64}")
+        assert "X-Delta-Base" not in response.headers
+
+        # Invalid hashes should return an error
+        response = client.get("/download-ffmpeg?platform=macOS&current_hash=abc")
+        json_data = response.json
+
+        assert json_data["status"] == "ERROR"
+        assert json_data["code"] == 400
+        assert json_data["description"] == "Invalid hash 'abc'. Must be a SHA-256 hex digest."
+    finally:
+        application.cache.pop("ffmpeg_bundles", None)
+        application.cache.pop("ffmpeg_signatures", None)
@@ -0,0 +1,251 @@
+"""
+test_github_client.py
+Description: Tests for the GitHub API client's circuit breaker and rate limit budget.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import time
+
+import pytest
+from requests import ConnectionError
+
+import application
+import github_client
+import tags
+
+
+# HELPERS
+class FakeResponse:
+    def __init__(self, status_code, text="[]", headers=None):
+        self.status_code = status_code
+        self.reason = "Fake Reason"
+        self.text = text
+        self.headers = headers or {}
+        self.links = {}
+
+
+class FakeSession:
+    """Session that returns (or raises) the scripted results in order."""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.num_requests = 0
+
+    def get(self, url, headers=None, timeout=None):
+        self.num_requests += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+# TESTS
+def test_circuit_breaker():
+    """Tests the circuit breaker's state transitions and exponential backoff."""
+
+    breaker = github_client.CircuitBreaker(failure_threshold=2, base_backoff=10, max_backoff=25)
+
+    # The circuit opens after 2 consecutive failures
+    breaker.record_failure(now=0)
+    assert breaker.allow_request(now=0)
+    breaker.record_failure(now=0)
+    assert breaker.state == github_client.OPEN
+    assert not breaker.allow_request(now=9)
+
+    # After the backoff a single trial request is let through
+    assert breaker.allow_request(now=10)
+    assert breaker.state == github_client.HALF_OPEN
+    assert not breaker.allow_request(now=10)
+
+    # A failed trial reopens the circuit with double the backoff
+    breaker.record_failure(now=10)
+    assert not breaker.allow_request(now=29)
+    assert breaker.get_status(now=29)["retry_in"] == 1
+
+    # The backoff is capped
+    assert breaker.allow_request(now=30)
+    breaker.record_failure(now=30)
+    assert breaker.open_until == 55
+
+    # A successful trial closes the circuit
+    assert breaker.allow_request(now=55)
+    breaker.record_success()
+    assert breaker.get_status() == {"state": github_client.CLOSED, "failures": 0, "consecutive_opens": 0, "retry_in": 0}
+
+
+def test_circuit_breaker_in_flight_failures():
+    """Tests that failures of requests that were in flight when the circuit opened do not escalate the backoff."""
+
+    breaker = github_client.CircuitBreaker(failure_threshold=2, base_backoff=10)
+
+    for _ in range(4):
+        breaker.record_failure(now=0)
+    assert breaker.open_until == 10
+    assert breaker.consecutive_opens == 1
+
+    # A rate limit backoff still keeps the circuit open for longer
+    breaker.record_failure(now=1, backoff=60)
+    assert breaker.open_until == 61
+    assert breaker.consecutive_opens == 1
+
+
+def test_rate_limit_budget():
+    """Tests that the TTL multiplier grows as the rate limit budget runs out."""
+
+    budget = github_client.RateLimitBudget(low_fraction=0.2, max_stretch=10)
+    assert budget.get_ttl_multiplier() == 1
+
+    budget.update({"X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "30", "X-RateLimit-Reset": "0"})
+    assert budget.get_ttl_multiplier() == 1
+
+    budget.update({"X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "6", "X-RateLimit-Reset": "0"})
+    assert budget.get_ttl_multiplier() == pytest.approx(2)
+
+    budget.update({"X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "100"})
+    assert budget.get_ttl_multiplier() == 10
+    assert budget.is_exhausted(now=99)
+    assert not budget.is_exhausted(now=100)
+
+
+def test_client_short_circuits():
+    """Tests that the client stops sending requests once the circuit is open or the budget is exhausted."""
+
+    session = FakeSession([FakeResponse(500), ConnectionError("Boom")])
+    client = github_client.GitHubClient(breaker=github_client.CircuitBreaker(failure_threshold=2), session=session)
+
+    assert client.get("repos/a/b/tags").status_code == 500
+    with pytest.raises(github_client.UpstreamUnavailableError, match="Could not reach GitHub"):
+        client.get("repos/a/b/tags")
+    with pytest.raises(github_client.UpstreamUnavailableError, match="circuit breaker is open"):
+        client.get("repos/a/b/tags")
+    assert session.num_requests == 2
+
+    # An exhausted budget keeps the circuit open until the budget resets
+    reset = int(time.time()) + 1000
+    session = FakeSession([
+        FakeResponse(403, headers={"X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset})
+    ])
+    client = github_client.GitHubClient(session=session)
+
+    assert client.get("repos/a/b/tags").status_code == 403
+    assert client.breaker.open_until >= reset - 1
+    with pytest.raises(github_client.UpstreamUnavailableError, match="rate limit exhausted"):
+        client.get("repos/a/b/tags")
+
+
+def test_secondary_rate_limit():
+    """Tests that a "403 Forbidden" with budget remaining opens the circuit for the `Retry-After` time."""
+
+    headers = {"X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "50", "X-RateLimit-Reset": "0", "Retry-After": "120"}
+    session = FakeSession([FakeResponse(403, headers=headers)])
+    client = github_client.GitHubClient(breaker=github_client.CircuitBreaker(failure_threshold=3), session=session)
+
+    start = time.time()
+    assert client.get("repos/a/b/tags").status_code == 403
+    assert client.breaker.state == github_client.OPEN
+    assert client.breaker.open_until >= start + 120
+    with pytest.raises(github_client.UpstreamUnavailableError, match="circuit breaker is open"):
+        client.get("repos/a/b/tags")
+
+
+def test_get_all(fake_github):
+    """Tests that every page is fetched, and that only the transformed entries are kept for conditional requests."""
+
+    fake_github.set_tags("a/b", [f"v0.{i}.0" for i in range(5)])
+    client = github_client.GitHubClient(api_url=fake_github.url)
+
+    response, pairs = client.get_all("repos/a/b/tags", per_page=2, transform=tags.get_name_sha_pairs)
+    assert response.status_code == 200
+    assert [name for name, _ in pairs] == [f"v0.{i}.0" for i in range(5)]
+    assert fake_github.count_requests(200) == 3
+
+    # Only the ETag, the transformed entries and the next page URL are kept for each page
+    assert len(client._pages) == 3
+    for _, page_pairs, _ in client._pages.values():
+        assert all(isinstance(pair, tuple) and len(pair) == 2 for pair in page_pairs)
+
+    # Unchanged pages are not fetched again, even if the "304 Not Modified" responses do not repeat the `Link` header
+    fake_github.link_on_304 = False
+    assert client.get_all("repos/a/b/tags", per_page=2, transform=tags.get_name_sha_pairs)[1] == pairs
+    assert fake_github.count_requests(304) == 3
+
+    # A failed page is returned as is
+    fake_github.script = [None, 500]
+    response, pairs = client.get_all("repos/a/b/tags", per_page=2, transform=tags.get_name_sha_pairs)
+    assert response.status_code == 500
+    assert pairs is None
+
+
+def test_pagination_and_etags(client, fake_github):
+    """Tests that all pages of tags are fetched, and that unchanged pages do not use up the rate limit."""
+
+    fake_github.set_tags(application.AUDITRANSCRIBE_REPO, [f"v0.{i}.0" for i in range(250)])
+
+    # All 3 pages should be fetched
+    response = client.get("/versions")
+    assert response.json["count"] == 250
+    assert response.json["versions"][-1] == "v0.249.0"
+    assert fake_github.count_requests(200) == 3
+    assert fake_github.rate_remaining == 4997
+
+    # Refreshing unchanged tags should only get "304 Not Modified" responses, which do not use up the rate limit
+    application.cache["tags:auditranscribe"] = (0, application.cache["tags:auditranscribe"][1])
+    response = client.get("/versions")
+    assert response.json["count"] == 250
+    assert fake_github.count_requests(304) == 3
+    assert fake_github.rate_remaining == 4997
+
+    # Changed tags should be picked up
+    fake_github.set_tags(application.AUDITRANSCRIBE_REPO, ["v1.0.0"])
+    application.cache["tags:auditranscribe"] = (0, application.cache["tags:auditranscribe"][1])
+    response = client.get("/check-if-have-new-version?current-version=v0.1.2")
+    assert response.json == {"status": "OK", "is_latest": False, "newer_tag": "v1.0.0"}
+
+
+def test_stale_tags_while_upstream_unavailable(client, monkeypatch):
+    """Tests that stale cached tags are served when GitHub is unavailable."""
+
+    session = FakeSession([ConnectionError("Boom"), FakeResponse(500)])
+    monkeypatch.setattr(application, "github", github_client.GitHubClient(
+        breaker=github_client.CircuitBreaker(failure_threshold=2), session=session
+    ))
+
+    try:
+        # Without any cached tags, the error is returned
+        response = client.get("/versions")
+        json_data = response.json
+
+        assert json_data["status"] == "ERROR"
+        assert json_data["code"] == 503
+        assert json_data["name"] == "Service Unavailable"
+
+        # With expired cached tags, the stale tags are returned instead
+        application.cache["tags:auditranscribe"] = (0, tags.TagTable(["v0.1.2"], ["a" * 40]))
+
+        for _ in range(3):
+            response = client.get("/versions")
+            assert response.json == {"status": "OK", "count": 1, "versions": ["v0.1.2"]}
+
+        # Only the requests before the circuit opened should have reached GitHub
+        assert session.num_requests == 2
+
+        response = client.get("/upstream-status")
+        assert response.json["circuit_breaker"]["state"] == github_client.OPEN
+        assert response.json["rate_limit"]["ttl_multiplier"] == 1
+    finally:
+        application.cache.pop("tags:auditranscribe", None)
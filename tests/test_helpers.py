@@ -19,7 +19,16 @@ OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 """
 
 # IMPORTS
+import os
+import threading
+import time
+
+import pytest
+import ujson
+
 import application
+import static_manifest
+import tags
 
 
 # TESTS
@@ -43,3 +52,159 @@ def test_cache_methods():
     success, value = application.get_from_cache("test", -1)  # Cache duration is -1 seconds
     assert success is False
     assert value is None
+
+
+def test_cache_events():
+    """Tests that only the first lookup of each key is recorded for the access log."""
+
+    with application.application.test_request_context("/versions"):
+        application.get_from_cache("test-events", 1e10)
+        application.add_to_cache("test-events", 123)
+        application.get_from_cache("test-events", float("inf"))
+
+        assert application.g.cache_events == {"test-events": "miss"}
+
+    application.cache.pop("test-events")
+
+
+def test_static_manifest(tmp_path):
+    """Tests the generation of the static update manifest."""
+
+    # Build and write the manifest
+    files = static_manifest.build_manifest(
+        ["v0.2.0-beta", "v0.1.2", "v0.1.1", "not-a-version"],
+        {"MACOS": "abc", "WINDOWS": "def"},
+        "ghi"
+    )
+    version_dir = static_manifest.write_manifest(str(tmp_path), files)
+
+    assert version_dir is not None
+    assert os.readlink(tmp_path / "current") == os.path.basename(version_dir)
+
+    # Check the contents of the files
+    with open(tmp_path / "current" / "latest.json") as f:
+        assert ujson.load(f) == {"status": "OK", "stable": "v0.1.2", "prerelease": "v0.2.0-beta"}
+
+    with open(tmp_path / "current" / "ffmpeg-WINDOWS.json") as f:
+        assert ujson.load(f) == {"status": "OK", "signature": "def"}
+
+    # Writing the same manifest again should do nothing
+    assert static_manifest.write_manifest(str(tmp_path), files) is None
+
+    # Writing new manifests should swap the symlink and prune the oldest version directory
+    for i in range(3):
+        static_manifest.write_manifest(
+            str(tmp_path), static_manifest.build_manifest([f"v0.{i}.0"], {"MACOS": "abc"}, "ghi")
+        )
+
+    with open(tmp_path / "current" / "versions.json") as f:
+        assert ujson.load(f) == {"status": "OK", "count": 1, "versions": ["v0.2.0"]}
+
+    assert len([name for name in os.listdir(tmp_path) if name.startswith("manifest-")]) == 2
+
+
+def test_concurrent_static_manifest_writes(tmp_path):
+    """Tests that threads writing the static manifest at the same time do not collide."""
+
+    errors = []
+
+    def write(i):
+        try:
+            for j in range(10):
+                static_manifest.write_manifest(
+                    str(tmp_path), static_manifest.build_manifest([f"v{i}.{j}.0"], {"MACOS": "abc"}, "ghi")
+                )
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert os.path.isfile(tmp_path / "current" / "versions.json")
+    assert [name for name in os.listdir(tmp_path) if name.startswith(".tmp-")] == []
+
+
+def test_refresh_static_manifest(client, tmp_path, monkeypatch):
+    """Tests that the static manifest is regenerated (once) from the cached data."""
+
+    num_writes = 0
+    original_write_manifest = static_manifest.write_manifest
+
+    def counting_write_manifest(*args, **kwargs):
+        nonlocal num_writes
+        num_writes += 1
+        return original_write_manifest(*args, **kwargs)
+
+    monkeypatch.setattr(static_manifest, "write_manifest", counting_write_manifest)
+    application.application.config["STATIC_MANIFEST_DIR"] = str(tmp_path)
+
+    try:
+        # Reading the signatures while refreshing should not refresh the manifest again
+        application.add_to_cache("tags:auditranscribe", tags.TagTable(["v0.1.2", "v0.1.1"], ["a" * 40, "b" * 40]))
+        application.cache.pop("ffmpeg_signatures", None)
+        application.cache.pop("audio_resource_signature", None)
+        application.refresh_static_manifest().result(timeout=10)
+
+        assert num_writes == 1
+
+        with open(tmp_path / "current" / "versions.json") as f:
+            assert ujson.load(f) == {"status": "OK", "count": 2, "versions": ["v0.1.2", "v0.1.1"]}
+
+        with open(tmp_path / "current" / "ffmpeg-MACOS.json") as f:
+            assert ujson.load(f)["signature"] == "9cd8808b50da3fcf434110572464db67f9ea3613b0731d27ce2eddddea3dfc14"
+
+        # Requests that refresh the manifest should not wait for it to be written
+        def slow_write_manifest(*args, **kwargs):
+            time.sleep(0.5)
+            return counting_write_manifest(*args, **kwargs)
+
+        monkeypatch.setattr(static_manifest, "write_manifest", slow_write_manifest)
+        application.cache.pop("audio_resource_signature", None)
+
+        start = time.perf_counter()
+        response = client.get("/download-audio-resource?signature_needed=true")
+        assert response.json["status"] == "OK"
+        assert time.perf_counter() - start < 0.25
+
+        application.manifest_write.result(timeout=10)
+        assert num_writes == 2
+    finally:
+        application.application.config["STATIC_MANIFEST_DIR"] = None
+        application.cache.pop("tags:auditranscribe", None)
+
+
+def test_tag_table():
+    """Tests the compact storage of the version tags."""
+
+    raw_info = ujson.dumps([
+        {"name": "v0.2.0", "zipball_url": "...", "commit": {"sha": "a" * 40, "url": "..."}, "node_id": "..."},
+        {"name": "v0.10.0-beta", "commit": {"sha": "b" * 40}},
+        {"name": "not-a-version", "commit": {"sha": "c" * 40}}
+    ])
+    tag_table = tags.TagTable.from_raw_info(raw_info)
+
+    assert tag_table.names == ("v0.2.0", "v0.10.0-beta", "not-a-version")
+    assert tag_table.version_keys[2] is None
+
+    # Only the requested fields should be output
+    assert tag_table.project() == [
+        {"name": "v0.2.0", "commit": {"sha": "a" * 40}},
+        {"name": "v0.10.0-beta", "commit": {"sha": "b" * 40}},
+        {"name": "not-a-version", "commit": {"sha": "c" * 40}}
+    ]
+    assert tag_table.project(("commit.sha",))[0] == {"commit": {"sha": "a" * 40}}
+
+    # Invalid tags should be ignored when finding the newest version
+    assert str(tag_table.get_newest_version()) == "0.10.0-beta"
+    assert tag_table.get_newest_version(minimum=tags.parse_version("v1.0.0")) is None
+
+    # Field lists should be validated
+    assert tags.parse_fields("name, commit.sha") == ("name", "commit.sha")
+    assert tags.parse_fields("commit.sha,name,name") == ("name", "commit.sha")
+
+    with pytest.raises(ValueError, match="Invalid field 'tarball_url'"):
+        tags.parse_fields("name,tarball_url")
@@ -19,16 +19,21 @@ OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 """
 
 # IMPORTS
+import gzip
 from io import BytesIO
 
 import ujson
 
+import application
+import compression
+import tags
+
 
 # TESTS
-def test_get_raw_info(client):
+def test_get_raw_info(client, fake_github):
     """Tests whether the server correctly returns raw info."""
 
-    # First time is directly requesting from the GitHub API
+    # First time is directly requesting from the (fake) GitHub API
     response = client.get("/get-raw-info")
     json_data = response.json
     assert json_data["status"] == "OK"
@@ -61,7 +66,7 @@ def test_get_raw_info(client):
     assert required_release["commit"]["sha"] == "cbfd141de9e7c52299cc5116a6704ba7dd36f6f8"
 
 
-def test_get_versions(client):
+def test_get_versions(client, fake_github):
     """Tests the `get_versions` endpoint."""
     response = client.get("/versions")
     json_data = response.json
@@ -71,7 +76,7 @@ def test_get_versions(client):
     assert "v0.1.2" in json_data["versions"]
 
 
-def test_check_if_have_new_version(client):
+def test_check_if_have_new_version(client, fake_github):
     """Tests the endpoint that allows the client to check whether a new version is available."""
 
     # Test 1: Version 0.0.0 should say that version is not latest
@@ -245,3 +250,122 @@ def test_api_server_get_and_post(client):
 
     response = client.post("/test-api-server-post", data={"is-testing": True})
     assert response.json == {"status": "OK", "data1": "Eggs and spam", "data2": False, "data3": 12.345, "data4": 678.9}
+
+
+def test_response_compression(client, monkeypatch):
+    """Tests that large responses are compressed, and that cached payloads are only compressed once."""
+
+    # Count the number of times that compression happens
+    num_compressions = 0
+    original_compress = compression.compress
+
+    def counting_compress(data, encoding):
+        nonlocal num_compressions
+        num_compressions += 1
+        return original_compress(data, encoding)
+
+    monkeypatch.setattr(compression, "compress", counting_compress)
+
+    # Count the number of times that the payload is built
+    num_projections = 0
+    original_project = tags.TagTable.project
+
+    def counting_project(self, *args, **kwargs):
+        nonlocal num_projections
+        num_projections += 1
+        return original_project(self, *args, **kwargs)
+
+    monkeypatch.setattr(tags.TagTable, "project", counting_project)
+
+    # Use a large fake tag payload
+    tag_list = [{"name": f"v0.{i}.0", "commit": {"sha": "0" * 40}} for i in range(100)]
+    application.add_to_cache("tags:auditranscribe", tags.TagTable.from_raw_info(ujson.dumps(tag_list)))
+
+    try:
+        # Test 1: Clients that accept gzip get a gzipped response
+        response = client.get("/get-raw-info", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert ujson.loads(ujson.loads(gzip.decompress(response.data))["raw_info"]) == tag_list
+
+        # Test 2: A second request for the same payload should reuse the compressed body, without building the payload
+        second_response = client.get("/get-raw-info", headers={"Accept-Encoding": "gzip"})
+
+        assert second_response.data == response.data
+        assert num_compressions == 1
+        assert num_projections == 1
+
+        # Test 3: Clients that do not accept any encoding get an uncompressed response
+        response = client.get("/versions")
+
+        assert "Content-Encoding" not in response.headers
+        assert response.json["count"] == 100
+
+        # Test 4: Updating the cache should invalidate the compressed body
+        application.add_to_cache("tags:auditranscribe", tags.TagTable.from_raw_info(ujson.dumps(tag_list[:50])))
+        response = client.get("/get-raw-info", headers={"Accept-Encoding": "gzip"})
+
+        assert ujson.loads(ujson.loads(gzip.decompress(response.data))["raw_info"]) == tag_list[:50]
+        assert num_compressions == 2
+
+        # Test 5: A body built from old data (e.g. while another thread updated the cache) should not be reused
+        old_table = tags.TagTable(["v0.0.1"], ["1" * 40])
+        new_table = tags.TagTable(["v0.0.2"], ["2" * 40])
+
+        with application.application.test_request_context("/versions", headers={"Accept-Encoding": "gzip"}):
+            application.add_to_cache("tags:auditranscribe", new_table)
+            application.make_json(
+                "OK", 200, cache_key="tags:auditranscribe", source=old_table, versions=["v0.0.1"] * 500
+            )
+
+        response = client.get("/versions", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers  # The new body is too small to compress
+        assert response.json["versions"] == ["v0.0.2"]
+
+        # Test 6: Small responses should not be compressed
+        response = client.get("/get-api-server-version", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+    finally:
+        application.cache.pop("tags:auditranscribe", None)
+
+
+def test_get_raw_info_fields(client):
+    """Tests the field projection of the raw info."""
+
+    application.add_to_cache("tags:auditranscribe", tags.TagTable(["v0.1.2", "v0.1.1"], ["a" * 40, "b" * 40]))
+
+    try:
+        # Test 1: Only the tag names
+        response = client.get("/get-raw-info?fields=name")
+        assert ujson.loads(response.json["raw_info"]) == [{"name": "v0.1.2"}, {"name": "v0.1.1"}]
+
+        # Test 2: Only the commit SHAs
+        response = client.get("/get-raw-info?fields=commit.sha")
+        assert ujson.loads(response.json["raw_info"]) == [{"commit": {"sha": "a" * 40}}, {"commit": {"sha": "b" * 40}}]
+
+        # Test 3: Invalid fields should return an error
+        response = client.get("/get-raw-info?fields=name,node_id")
+        json_data = response.json
+
+        assert json_data["status"] == "ERROR"
+        assert json_data["code"] == 400
+        assert json_data["name"] == "Invalid Request"
+        assert json_data["description"] == "Invalid field 'node_id'. Must be one of 'name', 'commit.sha'."
+
+        # Test 4: Duplicated or reordered fields should share one compressed body
+        big_table = tags.TagTable([f"v0.{i}.0" for i in range(100)], ["a" * 40] * 100)
+        application.add_to_cache("tags:auditranscribe", big_table)
+        application.compressed_cache.clear()
+
+        for fields in ["name,commit.sha", "commit.sha,name", "name,name,commit.sha", "commit.sha,name,commit.sha"]:
+            response = client.get(f"/get-raw-info?fields={fields}", headers={"Accept-Encoding": "gzip"})
+            assert response.headers["Content-Encoding"] == "gzip"
+        assert len(application.compressed_cache) == 1
+
+        # Test 5: The parsed versions should be used to check for new versions
+        application.add_to_cache("tags:auditranscribe", tags.TagTable(["v0.1.2", "v0.1.1"], ["a" * 40, "b" * 40]))
+        response = client.get("/check-if-have-new-version?current-version=v0.1.1")
+        assert response.json == {"status": "OK", "is_latest": False, "newer_tag": "v0.1.2"}
+    finally:
+        application.cache.pop("tags:auditranscribe", None)
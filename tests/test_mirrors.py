@@ -0,0 +1,121 @@
+"""
+test_mirrors.py
+Description: Tests for the download mirror redirection.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import application
+import mirrors
+
+
+# HELPERS
+def make_mirror_server(status_code):
+    """Starts a local HTTP server that stands in for a mirror, answering every request with the given status code."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            self.send_response(status_code)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture()
+def mirror_servers():
+    healthy_server = make_mirror_server(200)
+    unhealthy_server = make_mirror_server(503)
+
+    yield f"http://127.0.0.1:{healthy_server.server_port}", f"http://127.0.0.1:{unhealthy_server.server_port}"
+
+    healthy_server.shutdown()
+    unhealthy_server.shutdown()
+
+
+# TESTS
+def test_mirror_pool_selection(mirror_servers):
+    """Tests that only healthy mirrors are chosen."""
+
+    healthy_url, unhealthy_url = mirror_servers
+    pool = mirrors.MirrorPool([
+        mirrors.Mirror("healthy", healthy_url),
+        mirrors.Mirror("unhealthy", unhealthy_url, weight=100),
+        mirrors.Mirror("unreachable", "http://127.0.0.1:1", weight=100)
+    ], timeout=0.5)
+
+    # No mirror is used before the first health check
+    assert pool.choose() is None
+
+    pool.check_all()
+    assert [mirror.healthy for mirror in pool.mirrors] == [True, False, False]
+    assert pool.mirrors[0].latency is not None
+
+    for _ in range(10):
+        assert pool.choose().name == "healthy"
+
+
+def test_signed_mirror_url():
+    """Tests that mirrors with a secret produce signed, time-limited URLs."""
+
+    mirror = mirrors.Mirror("signed", "https://example.com/data/", secret="s3cr3t", url_lifetime=60)
+    url = urlparse(mirror.url_for("audio/Breakfast.wav"))
+    query = parse_qs(url.query)
+
+    assert url.path == "/data/audio/Breakfast.wav"
+    assert query["signature"][0] == mirror.sign("audio/Breakfast.wav", int(query["expires"][0]))
+
+
+def test_download_redirection(client, mirror_servers):
+    """Tests that downloads are redirected to a healthy mirror, and are served locally otherwise."""
+
+    healthy_url, unhealthy_url = mirror_servers
+
+    try:
+        # With a healthy mirror the download should be redirected
+        application.application.config["DOWNLOAD_MIRRORS"] = [{"name": "healthy", "base_url": healthy_url}]
+        application.get_mirror_pool().check_all()
+
+        response = client.get("/download-ffmpeg?platform=macOS")
+        assert response.status_code == 302
+        assert response.location == f"{healthy_url}/ffmpeg/ffmpeg-5.1.1-MACOS.zip"
+
+        # Signature requests are still answered by the API server
+        response = client.get("/download-audio-resource?signature_needed=true")
+        assert response.json["status"] == "OK"
+
+        # Without a healthy mirror the file should be sent by the API server
+        application.application.config["DOWNLOAD_MIRRORS"] = [{"name": "unhealthy", "base_url": unhealthy_url}]
+        application.get_mirror_pool().check_all()
+
+        response = client.get("/download-audio-resource")
+        assert response.status_code == 200
+
+        with open("data/audio/Breakfast.wav", "rb") as f:
+            assert response.data == f.read()
+    finally:
+        application.application.config["DOWNLOAD_MIRRORS"] = []
@@ -0,0 +1,97 @@
+"""
+test_package_zip.py
+Description: Tests for the deterministic, incremental ZIP packaging script.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import importlib.util
+import os
+import zipfile
+
+import pytest
+
+# CONSTANTS
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Package Contents Into ZIP.py")
+DATE_TIME = (2022, 10, 1, 12, 0, 0)
+
+
+# HELPERS
+@pytest.fixture()
+def packager(tmp_path, monkeypatch):
+    """Loads the packaging script and moves into a directory with some files to package."""
+
+    spec = importlib.util.spec_from_file_location("package_contents_into_zip", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("dist")
+    os.makedirs("data/audio")
+    os.makedirs("__pycache__")
+
+    with open("application.py", "w") as f:
+        f.write("print('Hello')\n" * 100)
+    with open("data/audio/Breakfast.wav", "wb") as f:
+        f.write(os.urandom(5000))  # Incompressible, so it is stored as is
+    with open("__pycache__/application.cpython-38.pyc", "wb") as f:
+        f.write(b"excluded")
+
+    return module
+
+
+def build(packager, name):
+    members, num_reused = packager.build_zip(
+        name, packager.get_files_to_include(), DATE_TIME, packager.load_manifest()
+    )
+    with open(name, "rb") as f:
+        return f.read(), num_reused
+
+
+# TESTS
+def test_rebuilds_are_identical(packager):
+    """Tests that rebuilding unchanged files gives a byte-identical archive, reusing every member."""
+
+    first, num_reused = build(packager, "dist/first.zip")
+    assert num_reused == 0
+
+    second, num_reused = build(packager, "dist/second.zip")
+    assert num_reused == 2
+    assert second == first
+
+    with zipfile.ZipFile("dist/second.zip") as archive:
+        assert archive.namelist() == ["application.py", "data/", "data/audio/", "data/audio/Breakfast.wav"]
+        assert archive.getinfo("application.py").compress_type == zipfile.ZIP_DEFLATED
+        assert archive.getinfo("data/audio/Breakfast.wav").compress_type == zipfile.ZIP_STORED
+
+
+def test_incremental_rebuild(packager):
+    """Tests that changed files are recompressed while unchanged members are copied into a valid archive."""
+
+    build(packager, "dist/first.zip")
+
+    with open("application.py", "w") as f:
+        f.write("print('Goodbye')\n" * 200)
+
+    _, num_reused = build(packager, "dist/second.zip")
+    assert num_reused == 1
+
+    with zipfile.ZipFile("dist/second.zip") as archive:
+        assert archive.testzip() is None
+        assert archive.read("application.py") == b"print('Goodbye')\n" * 200
+        with open("data/audio/Breakfast.wav", "rb") as f:
+            assert archive.read("data/audio/Breakfast.wav") == f.read()
@@ -0,0 +1,108 @@
+"""
+test_refresh_scheduler.py
+Description: Tests for multi-repository tag tracking and the background refresh scheduler.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import threading
+import time
+
+import application
+import refresh_scheduler
+import tags
+
+
+# TESTS
+def test_refresh_scheduler():
+    """Tests that the scheduler refreshes due keys concurrently, with bounded parallelism and jittered intervals."""
+
+    running = 0
+    max_running = 0
+    refreshed = []
+    lock = threading.Lock()
+
+    def refresh(key):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+            refreshed.append(key)
+
+    scheduler = refresh_scheduler.RefreshScheduler(refresh, max_workers=3, jitter=0.1)
+    now = time.time()
+
+    try:
+        for i in range(6):
+            scheduler.register(f"repo-{i}", ttl=100, now=now)
+
+        # The first refreshes should be spread out over the first jitter window
+        first_due = [entry["next_due"] for entry in scheduler.entries.values()]
+        assert all(now <= due <= now + 10 for due in first_due)
+        assert len(set(first_due)) > 1
+
+        # Nothing should be due before the jitter window starts
+        assert scheduler.run_due(now=now - 1) == {}
+
+        # Once due, every key should be refreshed, but no more than 3 at a time
+        started = scheduler.run_due(now=now + 10)
+        for future in started.values():
+            future.result(timeout=5)
+
+        assert sorted(refreshed) == [f"repo-{i}" for i in range(6)]
+        assert max_running == 3
+
+        # The next refreshes should be before the TTL expires, at jittered times
+        next_due = [entry["next_due"] - now for entry in scheduler.entries.values()]
+        assert all(72 - 1 <= due <= 88 + 1 for due in next_due)
+        assert scheduler.run_due(now=now + 10) == {}
+    finally:
+        scheduler.stop()
+
+
+def test_tracked_repositories(client, monkeypatch):
+    """Tests that the tag routes accept a tracked repository key, regardless of its case."""
+
+    monkeypatch.setitem(application.application.config, "TRACKED_REPOSITORIES", {
+        "auditranscribe": {"repo": application.AUDITRANSCRIBE_REPO, "ttl": 300},
+        "Plugins": {"repo": "AudiTranscribe/Plugins", "ttl": 600}
+    })
+    application.add_to_cache("tags:plugins", tags.TagTable(["v1.0.0", "v2.0.0"], ["a" * 40, "b" * 40]))
+
+    try:
+        # Test 1: The versions of the plugins repository
+        response = client.get("/versions?repo=plugins")
+        assert response.json == {"status": "OK", "count": 2, "versions": ["v1.0.0", "v2.0.0"]}
+
+        # Test 2: Checking for a new version of the plugins repository
+        response = client.get("/check-if-have-new-version?repo=PLUGINS&current-version=v1.5.0")
+        assert response.json == {"status": "OK", "is_latest": False, "newer_tag": "v2.0.0"}
+
+        # Test 3: Unknown repositories should return an error
+        response = client.get("/get-raw-info?repo=nonexistent")
+        json_data = response.json
+
+        assert json_data["status"] == "ERROR"
+        assert json_data["code"] == 400
+        assert json_data["name"] == "Invalid Request"
+        assert json_data["description"] == \
+               "Unknown repository 'nonexistent'. Must be one of 'auditranscribe', 'plugins'."
+    finally:
+        application.cache.pop("tags:plugins", None)
@@ -0,0 +1,131 @@
+"""
+test_telemetry.py
+Description: Tests for the telemetry counters and the telemetry page.
+
+Copyright © 2022 AudiTranscribe Team
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# IMPORTS
+import datetime
+import sqlite3
+import threading
+
+import application
+import tags
+import telemetry
+
+
+# TESTS
+def test_telemetry_counters(tmp_path):
+    """Tests that the counts of all threads are summed, and that repeated flushes add to the stored counts."""
+
+    path = str(tmp_path / "telemetry.db")
+    counters = telemetry.TelemetryCounters(path)
+    now = datetime.datetime(2022, 10, 1, 12, tzinfo=datetime.timezone.utc).timestamp()
+
+    def record_hits():
+        for _ in range(1000):
+            counters.record("/check-if-have-new-version", version="v0.1.2", now=now)
+
+    threads = [threading.Thread(target=record_hits) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    counters.record("/download-ffmpeg", platform="MACOS", status=302, now=now + 86400)
+    counters.flush()
+
+    # The shards of the finished threads should have been dropped
+    assert len(counters._shards) == 1
+
+    counters.record("/check-if-have-new-version", version="v0.1.2", now=now)
+    counters.flush()
+    counters.flush()  # Nothing new to write
+
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+        assert connection.execute("SELECT * FROM hits ORDER BY day").fetchall() == [
+            ("2022-10-01", "/check-if-have-new-version", "", "v0.1.2", 200, 4001),
+            ("2022-10-02", "/download-ffmpeg", "MACOS", "", 302, 1)
+        ]
+    connection.close()
+
+    # Aggregates can be limited to recent days and grouped by any column
+    assert telemetry.get_aggregates(path, ["route"]) == [
+        {"route": "/check-if-have-new-version", "count": 4001},
+        {"route": "/download-ffmpeg", "count": 1}
+    ]
+    assert telemetry.get_aggregates(path, ["platform"], since=datetime.date(2022, 10, 2)) == [
+        {"platform": "MACOS", "count": 1}
+    ]
+    assert telemetry.get_aggregates(str(tmp_path / "missing.db"), ["route"]) == []
+
+
+def test_telemetry_page(client, monkeypatch, tmp_path):
+    """Tests that version checks and FFmpeg downloads are counted and summarised."""
+
+    path = str(tmp_path / "telemetry.db")
+
+    # Telemetry is disabled by default
+    response = client.get("/telemetry")
+    assert response.json["code"] == 404
+
+    application.application.config["TELEMETRY_DB"] = path
+
+    try:
+        application.cache["tags:auditranscribe"] = (
+            datetime.datetime.now().timestamp(), tags.TagTable(["v0.2.0", "v0.1.2"], ["a" * 40, "b" * 40])
+        )
+
+        for _ in range(3):
+            client.get("/check-if-have-new-version?current-version=v0.1.2")
+        client.get("/check-if-have-new-version?current-version=v0.2.0")
+        for i in range(3):
+            client.get(f"/check-if-have-new-version?current-version=v0.0.{i}")  # Untagged versions
+        client.get("/check-if-have-new-version?current-version=not-a-version")
+        client.get("/download-audio-resource")
+        client.get("/download-ffmpeg?platform=MACOS&signature_needed=true")
+        client.get("/download-ffmpeg?platform=LINUX")
+
+        # Counts are only visible once they have been flushed
+        assert client.get("/telemetry").json["versions"] == {}
+
+        application.get_telemetry_counters().record("/download-ffmpeg", platform="WINDOWS", status=302)
+        application.get_telemetry_counters().flush()
+
+        response = client.get("/telemetry?days=1")
+        json_data = response.json
+
+        assert json_data["status"] == "OK"
+        assert json_data["since"] == datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+        assert json_data["versions"] == {"v0.1.2": 3, "other": 3, "v0.2.0": 1}
+        assert json_data["downloads"] == {"WINDOWS": 1}
+        assert {"route": "/download-ffmpeg", "platform": "", "version": "", "status": 400, "count": 1} in \
+               json_data["hits"]
+        assert sum(hit["count"] for hit in json_data["hits"]) == 10
+
+        # The number of grouped hit counts listed is capped
+        monkeypatch.setattr(application, "TELEMETRY_MAX_HITS", 2)
+        assert len(client.get("/telemetry").json["hits"]) == 2
+
+        for days in ["0", "-1", "abc", "²"]:
+            response = client.get(f"/telemetry?days={days}")
+            assert response.json["code"] == 400
+    finally:
+        application.cache.pop("tags:auditranscribe", None)
+        application.application.config["TELEMETRY_DB"] = None
+        application.get_telemetry_counters()  # Stops the counters